@@ -0,0 +1,96 @@
+"""
+Caches em memória do processo da API.
+
+A API roda como um único processo (uvicorn): um dicionário protegido por lock basta e evita ida ao banco
+em leituras repetidas. Com vários workers cada processo teria o próprio cache, e a invalidação feita por um
+não chegaria aos outros; nesse cenário estes caches precisariam ir para um armazenamento compartilhado.
+"""
+
+from collections import OrderedDict
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class OwnerCache:
+    # Cache de respostas agrupadas por "dono" (ex.: aluno), invalidado por dono ou por completo.
+    # Cada dono tem uma geração: quem leu do banco antes de uma invalidação não consegue gravar
+    # o resultado (possivelmente desatualizado) depois dela.
+    #
+    # Tudo é limitado a `max_owners` (LRU): respostas, gerações e o mapeamento usuário -> dono.
+    # As gerações vêm de um contador único; a geração de um dono descartado passa a valer como piso
+    # (`_floor`) para todos os donos sem geração própria, então um token antigo nunca volta a ser válido.
+
+    def __init__(self, max_owners: int = 4096):
+        self._max_owners = max_owners
+        self._entries: "OrderedDict[Hashable, Dict[Hashable, Any]]" = OrderedDict()
+        self._generations: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._owners: "OrderedDict[Hashable, Hashable]" = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def _token(self, owner: Hashable) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(owner, self._floor)
+
+    def owner_for(self, alias: Hashable, load: Callable[[], Optional[Hashable]]) -> Optional[Hashable]:
+        # Dono associado a `alias` (ex.: user_id do aluno -> student_id), com `load` consultando o banco
+        # só na primeira vez. Para vínculos que não mudam; `None` (sem dono) não fica guardado.
+        with self._lock:
+            owner = self._owners.get(alias)
+            if owner is not None:
+                self._owners.move_to_end(alias)
+                return owner
+        owner = load()
+        if owner is not None:
+            with self._lock:
+                self._owners[alias] = owner
+                self._owners.move_to_end(alias)
+                while len(self._owners) > self._max_owners:
+                    self._owners.popitem(last=False)
+        return owner
+
+    def get(self, owner: Hashable, key: Hashable) -> Tuple[Optional[Any], Tuple[int, int]]:
+        # Retorna (valor ou None, token); o token deve ser repassado a `set` após ler do banco.
+        with self._lock:
+            token = self._token(owner)
+            entries = self._entries.get(owner)
+            if entries is None or key not in entries:
+                return None, token
+            self._entries.move_to_end(owner)
+            return entries[key], token
+
+    def set(self, owner: Hashable, key: Hashable, value: Any, token: Tuple[int, int]) -> None:
+        with self._lock:
+            if token != self._token(owner):
+                return
+            self._entries.setdefault(owner, {})[key] = value
+            self._entries.move_to_end(owner)
+            while len(self._entries) > self._max_owners:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, owner: Optional[Hashable] = None) -> None:
+        # Sem `owner`, descarta tudo. Chamar após o commit da alteração.
+        with self._lock:
+            if owner is None:
+                self._entries.clear()
+                self._generations.clear()
+                self._owners.clear()
+                self._floor = 0
+                self._epoch += 1
+                return
+            self._entries.pop(owner, None)
+            self._clock += 1
+            self._generations[owner] = self._clock
+            self._generations.move_to_end(owner)
+            while len(self._generations) > self._max_owners:
+                _, generation = self._generations.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+
+# Agenda do aluno (GET /planos/aluno/agenda), por student_id.
+agenda_cache = OwnerCache()
+
+# Biblioteca de exercícios (GET /exercicios), pelo professor dono da biblioteca. O token de `get` serve
+# também de versão da biblioteca (ETag), pois muda a cada invalidação.
+library_cache = OwnerCache()
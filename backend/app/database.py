@@ -3,6 +3,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from dotenv import load_dotenv
 
+from .serialization import dumps, loads
+
 load_dotenv()
 
 
@@ -18,10 +20,22 @@ engine = create_engine(
     DATABASE_URL,
     connect_args=connect_args,
     pool_pre_ping=True,
+    # Colunas JSON (params, endurance_params) usam o mesmo serializador das respostas (orjson quando instalado).
+    json_serializer=dumps,
+    json_deserializer=loads,
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def dialect_insert(db, model):
+    # INSERT com suporte a ON CONFLICT (SQLite e PostgreSQL têm a mesma API no SQLAlchemy).
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -2,9 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from .database import Base, engine
+from .migrations import run_migrations
 from .routers import api_router
+from .serialization import NEXT_CURSOR_HEADER, NEXT_OFFSET_HEADER
 
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI(title="Sistema Fitness Total - API")
 
@@ -14,6 +17,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, NEXT_OFFSET_HEADER],
 )
 
 app.include_router(api_router)
@@ -0,0 +1,166 @@
+"""
+Migrações leves (idempotentes) do banco.
+
+O projeto não usa Alembic: tabelas novas são criadas por `Base.metadata.create_all` na subida da API.
+Como `create_all` não altera tabelas que já existem, os ajustes incrementais de schema
+(colunas e índices novos em tabelas antigas etc.) ficam aqui e podem rodar a cada inicialização sem efeito colateral.
+
+Ajustes de dados (ex.: calcular agregados para o histórico gravado antes deles existirem) ficam em
+`DATA_MIGRATIONS` e rodam uma única vez por banco, registrados na tabela `data_migrations`.
+"""
+
+from typing import Callable, List, Set, Tuple
+
+from sqlalchemy import false, inspect, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+from .database import Base
+from .models import (
+    DataMigration,
+    Exercise,
+    ExerciseMeta,
+    TrainingPlan,
+    TrainingPlanMeta,
+    TrainingSession,
+    TrainingSessionExercise,
+    TrainingSessionExerciseMeta,
+    TrainingSessionMeta,
+    TrainingExecution,
+)
+from .routers.executions import (
+    _backfill_exercise_sets,
+    _compact_snapshots,
+    _rebuild_evolution,
+    _rebuild_student_rollups,
+)
+from .routers.plans import _rebuild_exercise_usage
+from .search import ensure_exercise_search
+
+# Colunas `active` denormalizadas e a meta que cada uma espelha.
+ACTIVE_FLAGS = (
+    (Exercise, ExerciseMeta, ExerciseMeta.exercise_id),
+    (TrainingPlan, TrainingPlanMeta, TrainingPlanMeta.plan_id),
+    (TrainingSession, TrainingSessionMeta, TrainingSessionMeta.session_id),
+    (TrainingSessionExercise, TrainingSessionExerciseMeta, TrainingSessionExerciseMeta.session_exercise_id),
+)
+
+
+def ensure_columns(engine: Engine) -> Set[Tuple[str, str]]:
+    # Adiciona colunas novas (sempre anuláveis ou com default) declaradas nos modelos em tabelas já existentes.
+    # Retorna as colunas criadas, como (tabela, coluna), para os ajustes de dados que dependem delas.
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added: Set[Tuple[str, str]] = set()
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+                added.add((table.name, column.name))
+    return added
+
+
+def sync_active_flags(engine: Engine, only_tables: Set[str] = None) -> None:
+    # Copia o estado arquivado das tabelas *_meta para a coluna `active` dos registros (idempotente).
+    with engine.begin() as conn:
+        for model, meta_model, meta_key in ACTIVE_FLAGS:
+            if only_tables is not None and model.__tablename__ not in only_tables:
+                continue
+            archived = select(meta_key).where(meta_model.active.is_(False))
+            conn.execute(update(model).where(model.id.in_(archived)).values(active=false()))
+
+
+def ensure_indexes(engine: Engine) -> None:
+    # Cria índices declarados nos modelos que ainda não existem em tabelas já criadas.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def _students_with_executions(db: Session) -> List[int]:
+    return [
+        student_id
+        for (student_id,) in db.query(TrainingExecution.student_id)
+        .distinct()
+        .order_by(TrainingExecution.student_id)
+    ]
+
+
+def _batches(values: List[int], size: int = 200):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def backfill_exercise_sets(db: Session) -> None:
+    # Séries normalizadas (exercise_sets) das execuções gravadas antes da tabela existir. Vem antes
+    # dos demais ajustes, que leem as séries.
+    _backfill_exercise_sets(db)
+
+
+def rebuild_evolution_from_history(db: Session) -> None:
+    # Agregado de evolução de todos os alunos a partir das execuções já gravadas. Recalcula tudo,
+    # inclusive alunos com agregado parcial (criado só com as execuções novas).
+    for student_ids in _batches(_students_with_executions(db)):
+        _rebuild_evolution(db, student_ids)
+        db.commit()
+
+
+def rebuild_volume_rollups_from_history(db: Session) -> None:
+    # Séries semanais/mensais de volume de todos os alunos a partir de exercise_sets, inclusive
+    # alunos cujas séries foram criadas só com as execuções novas.
+    for student_ids in _batches(_students_with_executions(db)):
+        for student_id in student_ids:
+            _rebuild_student_rollups(db, student_id)
+        db.commit()
+
+
+def rebuild_exercise_usage(db: Session) -> None:
+    # Contadores de uso (sugestões de exercícios) a partir das fichas já montadas pelos professores.
+    _rebuild_exercise_usage(db)
+
+
+def compact_execution_snapshots(db: Session) -> None:
+    # Snapshots de prescrição embutidos nas execuções antigas passam para prescription_snapshots (deduplicados).
+    _compact_snapshots(db)
+
+
+# Ajustes de dados derivados do histórico, na ordem em que devem rodar. O nome fica registrado em
+# data_migrations; trocar o nome faz o ajuste rodar de novo.
+DATA_MIGRATIONS: Tuple[Tuple[str, Callable[[Session], None]], ...] = (
+    ("backfill-exercise-sets", backfill_exercise_sets),
+    ("rebuild-evolution-from-history", rebuild_evolution_from_history),
+    ("rebuild-volume-rollups-from-history", rebuild_volume_rollups_from_history),
+    ("rebuild-exercise-usage", rebuild_exercise_usage),
+    ("compact-execution-snapshots", compact_execution_snapshots),
+)
+
+
+def run_data_migrations(engine: Engine) -> None:
+    # Roda cada ajuste de DATA_MIGRATIONS uma única vez por banco (o primeiro deploy pode demorar
+    # em bancos com muito histórico).
+    with Session(bind=engine) as db:
+        applied = {name for (name,) in db.query(DataMigration.name)}
+        for name, migrate in DATA_MIGRATIONS:
+            if name in applied:
+                continue
+            migrate(db)
+            db.add(DataMigration(name=name))
+            db.commit()
+
+
+def run_migrations(engine: Engine) -> None:
+    added = ensure_columns(engine)
+    # Colunas `active` recém-criadas nascem como true: marca como inativos os registros já arquivados.
+    new_flags = {table for table, column in added if column == "active"}
+    if new_flags:
+        sync_active_flags(engine, new_flags)
+    ensure_indexes(engine)
+    ensure_exercise_search(engine)
+    run_data_migrations(engine)
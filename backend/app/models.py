@@ -9,11 +9,13 @@ Principais conceitos:
 
 Para manter histórico, usamos "arquivamento" (soft delete) em vez de apagar registros:
 - TrainingPlanMeta / TrainingSessionMeta / TrainingSessionExerciseMeta marcam itens como ativos/inativos.
+- A coluna `active` de exercises / training_plans / training_sessions / training_session_exercises espelha
+  a meta correspondente (sempre atualizada junto com ela) e é a usada nos filtros da ficha ativa.
 """
 
 from datetime import datetime
 from enum import Enum
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SAEnum, ForeignKey, Text, JSON, Float
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Enum as SAEnum, ForeignKey, Text, JSON, Float, Index, UniqueConstraint, true
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -125,9 +127,13 @@ class Exercise(Base):
     video_url = Column(String(255), nullable=True)
     endurance_params = Column(JSON, nullable=True)  # Para corrida/pedal: duração, zona, ritmo, tipo de treino etc.
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Espelho de exercise_meta.active (biblioteca ativa filtrada direto pelo índice).
+    active = Column(Boolean, nullable=False, default=True, server_default=true())
 
     professor = relationship("User")
 
+    __table_args__ = (Index("ix_exercises_professor_active", "professor_id", "active"),)
+
 class TrainingPlan(Base):
     __tablename__ = "training_plans"
     id = Column(Integer, primary_key=True, index=True)
@@ -137,10 +143,14 @@ class TrainingPlan(Base):
     start_date = Column(DateTime, default=datetime.utcnow)
     end_date = Column(DateTime, nullable=True)
     notes = Column(Text, nullable=True)
+    # Espelho de training_plan_meta.active (ficha ativa filtrada direto pelo índice).
+    active = Column(Boolean, nullable=False, default=True, server_default=true())
 
     student = relationship("Student")
     sessions = relationship("TrainingSession", back_populates="plan")
 
+    __table_args__ = (Index("ix_training_plans_student_active", "student_id", "active"),)
+
 class TrainingSession(Base):
     __tablename__ = "training_sessions"
     id = Column(Integer, primary_key=True, index=True)
@@ -149,10 +159,14 @@ class TrainingSession(Base):
     sequence = Column(Integer, nullable=True)
     main_type = Column(String(50), nullable=True)
     notes = Column(Text, nullable=True)
+    # Espelho de training_session_meta.active (ficha ativa filtrada direto pelo índice).
+    active = Column(Boolean, nullable=False, default=True, server_default=true())
 
     plan = relationship("TrainingPlan", back_populates="sessions")
     items = relationship("TrainingSessionExercise", back_populates="session")
 
+    __table_args__ = (Index("ix_training_sessions_plan_active_sequence", "plan_id", "active", "sequence"),)
+
 class TrainingSessionExercise(Base):
     __tablename__ = "training_session_exercises"
     id = Column(Integer, primary_key=True, index=True)
@@ -161,10 +175,16 @@ class TrainingSessionExercise(Base):
     order = Column(Integer, default=1)
     params = Column(JSON, nullable=True)  # Parâmetros estruturados (séries/rep/carga ou duração/pace etc.)
     notes = Column(Text, nullable=True)
+    # Espelho de training_session_exercise_meta.active (itens ativos lidos por range scan no índice).
+    active = Column(Boolean, nullable=False, default=True, server_default=true())
 
     session = relationship("TrainingSession", back_populates="items")
     exercise = relationship("Exercise")
 
+    __table_args__ = (
+        Index("ix_training_session_exercises_session_active_order", "session_id", "active", "order"),
+    )
+
 class ExecutionStatus(str, Enum):
     CONCLUIDO = "CONCLUIDO"
     PARCIAL = "PARCIAL"
@@ -179,10 +199,18 @@ class TrainingExecution(Base):
     status = Column(SAEnum(ExecutionStatus), default=ExecutionStatus.CONCLUIDO)
     rpe = Column(Integer, nullable=True)
     comment = Column(Text, nullable=True)
+    # Chave de idempotência enviada pelo app na sincronização offline (ver POST /execucoes/lote).
+    client_id = Column(String(64), nullable=True)
 
     student = relationship("Student")
     session = relationship("TrainingSession")
 
+    __table_args__ = (
+        # Histórico paginado por cursor: (aluno, data, id) em ordem decrescente.
+        Index("ix_training_executions_student_executed", "student_id", "executed_at", "id"),
+        Index("uq_training_executions_student_client", "student_id", "client_id", unique=True),
+    )
+
 class ExerciseExecution(Base):
     __tablename__ = "exercise_executions"
     id = Column(Integer, primary_key=True, index=True)
@@ -190,9 +218,120 @@ class ExerciseExecution(Base):
     session_exercise_id = Column(Integer, ForeignKey("training_session_exercises.id"), nullable=False)
     data = Column(Text, nullable=True)  # JSON em string
     notes = Column(Text, nullable=True)
+    # Snapshot da prescrição guardado uma única vez em prescription_snapshots (endereçado pelo hash).
+    # Quando preenchido, `data` guarda apenas {"performed": ...}; registros antigos trazem o snapshot embutido.
+    snapshot_hash = Column(String(64), ForeignKey("prescription_snapshots.hash"), nullable=True)
 
     training_execution = relationship("TrainingExecution")
     session_exercise = relationship("TrainingSessionExercise")
+    sets = relationship("ExerciseSet", back_populates="exercise_execution", order_by="ExerciseSet.set_index")
+
+
+class PrescriptionSnapshot(Base):
+    # Snapshot da prescrição (nome/tipo/grupo do exercício, parâmetros e notas) no momento da execução.
+    # A mesma ficha executada várias vezes gera snapshots idênticos: guardamos cada conteúdo uma vez,
+    # identificado pelo SHA-256 do JSON canônico.
+    __tablename__ = "prescription_snapshots"
+    hash = Column(String(64), primary_key=True)
+    data = Column(Text, nullable=False)  # JSON em string
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ExerciseSet(Base):
+    # Séries realizadas, normalizadas a partir de `ExerciseExecution.data` (performed.set_details).
+    # Guarda o texto digitado pelo aluno e o valor numérico já interpretado, para que máximos,
+    # melhores marcas e volume possam ser calculados no banco (MAX/SUM + índices) sem decodificar JSON.
+    __tablename__ = "exercise_sets"
+    id = Column(Integer, primary_key=True, index=True)
+    exercise_execution_id = Column(Integer, ForeignKey("exercise_executions.id"), nullable=False)
+    set_index = Column(Integer, nullable=False)  # posição da série em set_details (0 = primeira)
+    load_raw = Column(Text, nullable=True)
+    load_kg = Column(Float, nullable=True)
+    reps_raw = Column(Text, nullable=True)
+    reps = Column(Float, nullable=True)
+
+    exercise_execution = relationship("ExerciseExecution", back_populates="sets")
+
+    __table_args__ = (
+        UniqueConstraint("exercise_execution_id", "set_index", name="uq_exercise_sets_item_index"),
+        Index("ix_exercise_sets_item_load", "exercise_execution_id", "load_kg"),
+    )
+
+
+class StudentExerciseEvolution(Base):
+    # Agregado de evolução por (aluno, exercício), atualizado a cada execução registrada.
+    # Guarda o resumo (máximo de carga/reps) da última execução, da anterior e o melhor registro,
+    # para que a tela de evolução seja uma leitura direta em vez de reprocessar todo o histórico.
+    # Pode ser recalculado a partir das execuções (ver `maintenance.py rebuild-evolution`).
+    __tablename__ = "student_exercise_evolution"
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), primary_key=True)
+    # Primeiro ExerciseExecution do exercício no histórico (desempate estável na listagem).
+    first_item_id = Column(Integer, nullable=True)
+
+    last_execution_id = Column(Integer, ForeignKey("training_executions.id"), nullable=True)
+    last_executed_at = Column(DateTime, nullable=True)
+    last_load = Column(Text, nullable=True)
+    last_load_value = Column(Float, nullable=True)
+    last_reps = Column(Text, nullable=True)
+    last_reps_value = Column(Float, nullable=True)
+
+    prev_load = Column(Text, nullable=True)
+    prev_load_value = Column(Float, nullable=True)
+    prev_reps = Column(Text, nullable=True)
+    prev_reps_value = Column(Float, nullable=True)
+
+    best_load = Column(Text, nullable=True)
+    best_load_value = Column(Float, nullable=True)
+    best_reps = Column(Text, nullable=True)
+    best_reps_value = Column(Float, nullable=True)
+
+    total_executions = Column(Integer, default=0, nullable=False)
+    # Último ExerciseExecution com dados realizados (pré-preenchimento de carga/reps na UI).
+    last_performed_item_id = Column(Integer, ForeignKey("exercise_executions.id"), nullable=True)
+    last_performed_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    exercise = relationship("Exercise")
+
+
+class ExerciseVolumeRollup(Base):
+    # Série temporal por (aluno, exercício, período): volume (tonelagem = reps × carga somados por série),
+    # séries, reps e 1RM estimado. Atualizada a cada execução registrada (somas são aditivas) e
+    # recalculável a partir de exercise_sets (ver `maintenance.py rebuild-rollups`).
+    __tablename__ = "exercise_volume_rollups"
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    bucket = Column(String(10), primary_key=True)  # "week" (segunda-feira) ou "month" (dia 1)
+    bucket_start = Column(DateTime, primary_key=True)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), primary_key=True)
+    executions = Column(Integer, default=0, nullable=False)
+    total_sets = Column(Integer, default=0, nullable=False)
+    total_reps = Column(Float, default=0, nullable=False)
+    tonnage_kg = Column(Float, default=0, nullable=False)
+    best_load_kg = Column(Float, nullable=True)
+    best_e1rm_kg = Column(Float, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    exercise = relationship("Exercise")
+
+
+class ExerciseUsage(Base):
+    # Quantas vezes cada exercício foi prescrito nas fichas de cada professor (sugestões do seletor de exercícios).
+    # Incrementado quando itens são adicionados às sessões; edições (novas versões do item) não contam.
+    # Recalculável a partir de training_session_exercises (ver `maintenance.py rebuild-usage`).
+    __tablename__ = "exercise_usage"
+    professor_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    exercise_id = Column(Integer, ForeignKey("exercises.id"), primary_key=True)
+    uses = Column(Integer, default=0, nullable=False)
+
+    __table_args__ = (Index("ix_exercise_usage_professor_uses", "professor_id", "uses"),)
+
+
+class DataMigration(Base):
+    # Ajustes de dados já aplicados por `run_migrations` (cada um roda uma única vez por banco).
+    __tablename__ = "data_migrations"
+    name = Column(String(100), primary_key=True)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
 
 class ExerciseMeta(Base):
@@ -236,3 +375,6 @@ class TrainingSessionExerciseMeta(Base):
     replaced_by_id = Column(Integer, ForeignKey("training_session_exercises.id"), nullable=True)
 
     session_exercise = relationship("TrainingSessionExercise", foreign_keys=[session_exercise_id])
+
+    # Busca reversa da linhagem (versão anterior de um item) na CTE recursiva de plans.py.
+    __table_args__ = (Index("ix_training_session_exercise_meta_replaced_by", "replaced_by_id"),)
@@ -0,0 +1,98 @@
+"""
+Interpretação dos valores de carga/reps digitados pelo aluno.
+
+O aluno registra cargas e repetições como texto livre ("20", "20kg", "20,5", "45 lb", "12-10-8").
+Aqui ficam os padrões já compilados e as funções que convertem esses textos em números:
+- Carga: primeiro número do texto, normalizado para kg (libras são convertidas).
+- Reps: primeiro número do texto ("12-10-8" -> 12).
+
+As funções em lote (`parse_load_column` / `parse_reps_column`) recebem uma coluna inteira de valores
+(ex.: todas as séries de um histórico) e interpretam cada texto distinto uma única vez.
+"""
+
+from functools import lru_cache
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+LB_TO_KG = 0.45359237
+
+_NUMBER_RE = re.compile(r"(-?\d+(?:[.,]\d+)?)")
+_LOAD_RE = re.compile(r"(-?\d+(?:[.,]\d+)?)\s*(kgs?|quilos?|lbs?|libras?)?", re.IGNORECASE)
+_POUND_UNITS = ("lb", "lbs", "libra", "libras")
+
+
+def _to_float(number: str) -> Optional[float]:
+    try:
+        return float(number.replace(",", "."))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_load_text(raw: str) -> Optional[float]:
+    match = _LOAD_RE.search(raw)
+    if not match:
+        return None
+    value = _to_float(match.group(1))
+    if value is None:
+        return None
+    unit = (match.group(2) or "").lower()
+    if unit in _POUND_UNITS:
+        return value * LB_TO_KG
+    return value
+
+
+@lru_cache(maxsize=4096)
+def _parse_reps_text(raw: str) -> Optional[float]:
+    match = _NUMBER_RE.search(raw)
+    if not match:
+        return None
+    return _to_float(match.group(1))
+
+
+def parse_load(value: Any) -> Optional[float]:
+    # Extrai a carga em kg de valores como 20, "20", "20kg", "20,5", "45 lb". Números puros são kg.
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    raw = str(value).strip()
+    if not raw:
+        return None
+    return _parse_load_text(raw)
+
+
+def parse_reps(value: Any) -> Optional[float]:
+    # Extrai reps de valores como 12, "12", "12-10-8" (pega o primeiro número), etc.
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    raw = str(value).strip()
+    if not raw:
+        return None
+    return _parse_reps_text(raw)
+
+
+def _parse_column(values: Iterable[Any], parse_one) -> List[Optional[float]]:
+    # Uma passada pela coluna: textos repetidos (muito comuns em séries) são interpretados uma vez só.
+    seen: Dict[Any, Optional[float]] = {}
+    result: List[Optional[float]] = []
+    for value in values:
+        if isinstance(value, str):
+            if value not in seen:
+                seen[value] = parse_one(value)
+            result.append(seen[value])
+        else:
+            result.append(parse_one(value))
+    return result
+
+
+def parse_load_column(values: Iterable[Any]) -> List[Optional[float]]:
+    # Versão em lote de `parse_load`, preservando a ordem (None onde não há número).
+    return _parse_column(values, parse_load)
+
+
+def parse_reps_column(values: Iterable[Any]) -> List[Optional[float]]:
+    # Versão em lote de `parse_reps`, preservando a ordem (None onde não há número).
+    return _parse_column(values, parse_reps)
@@ -9,48 +9,74 @@ Por design, o aluno não "edita a ficha". Ele registra a execução. Assim:
 - Mudanças do professor na ficha NÃO alteram o histórico já registrado.
 """
 
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
-import json
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import or_
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Literal, Optional, Set, Tuple
+import base64
+import hashlib
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import and_, case, func, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..database import SessionLocal, dialect_insert, get_db
 from ..models import (
+    ExecutionStatus,
     Exercise,
+    ExerciseType,
     ExerciseExecution,
+    ExerciseSet,
+    ExerciseVolumeRollup,
+    PrescriptionSnapshot,
     Student,
+    StudentExerciseEvolution,
     TrainingExecution,
     TrainingPlan,
     TrainingSession,
     TrainingSessionExercise,
-    TrainingSessionExerciseMeta,
     User,
     UserType,
 )
+from ..parsing import parse_load_column, parse_reps_column
 from ..schemas import (
     ExecutionExerciseBrief,
     ExerciseExecutionIn,
     ExerciseEvolutionItem,
+    ExerciseVolumeSeriesItem,
     LastExercisePerformanceItem,
+    NaiveUTCDateTime,
+    StudentEvolutionReport,
     TrainingExecutionCreate,
     TrainingExecutionReport,
+    TrainingExecutionSyncItem,
+    TrainingExecutionSyncResult,
 )
+from ..serialization import NEXT_CURSOR_HEADER, dumps, loads, model_response, parse_json
 from ..core.security import get_current_user
 
 router = APIRouter()
 
+# Read-models das listas mais volumosas: montados com `model_construct` (dados vindos do nosso banco)
+# e serializados direto por estes adapters, sem validação na construção nem na resposta.
+_REPORT_LIST = TypeAdapter(List[TrainingExecutionReport])
+_EVOLUTION_LIST = TypeAdapter(List[ExerciseEvolutionItem])
+
 
 def _get_session_plan_student(db: Session, session_id: int):
-    # Resolve sessão -> plano -> aluno dono do plano.
-    session = db.get(TrainingSession, session_id)
-    if not session:
+    # Resolve sessão -> plano -> aluno dono do plano em uma única consulta.
+    row = (
+        db.query(TrainingSession, TrainingPlan, Student)
+        .outerjoin(TrainingPlan, TrainingPlan.id == TrainingSession.plan_id)
+        .outerjoin(Student, Student.id == TrainingPlan.student_id)
+        .filter(TrainingSession.id == session_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(status_code=404, detail="Sessão não encontrada")
-    plan = db.get(TrainingPlan, session.plan_id)
+    session, plan, student = row
     if not plan:
         raise HTTPException(status_code=404, detail="Plano não encontrado")
-    student = db.get(Student, plan.student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Aluno não encontrado")
     return session, plan, student
@@ -82,47 +108,6 @@ def _get_current_student(db: Session, current: User) -> Student:
     return student
 
 
-def _parse_load_value(value: Any) -> Optional[float]:
-    # Extrai valor numérico de cargas como "20", "20kg", "20,5" etc.
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
-        return float(value)
-    raw = str(value).strip()
-    if not raw:
-        return None
-    # aceita "20", "20kg", "20,5", "20.5"
-    import re
-
-    match = re.search(r"(-?\\d+(?:[\\.,]\\d+)?)", raw)
-    if not match:
-        return None
-    try:
-        return float(match.group(1).replace(",", "."))
-    except ValueError:
-        return None
-
-
-def _parse_reps_value(value: Any) -> Optional[float]:
-    # Extrai valor numérico de reps como "12", "12-10-8" (pega o primeiro número), etc.
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
-        return float(value)
-    raw = str(value).strip()
-    if not raw:
-        return None
-    import re
-
-    match = re.search(r"(-?\\d+(?:[\\.,]\\d+)?)", raw)
-    if not match:
-        return None
-    try:
-        return float(match.group(1).replace(",", "."))
-    except ValueError:
-        return None
-
-
 def _extract_max_load_and_reps(performed: Optional[Dict[str, Any]]):
     # Para evolução, pegamos um resumo simples por execução:
     # - maior carga registrada naquela sessão (máximo dentro de set_details)
@@ -136,224 +121,788 @@ def _extract_max_load_and_reps(performed: Optional[Dict[str, Any]]):
 
     set_details = performed.get("set_details")
     if isinstance(set_details, list):
-        for row in set_details:
-            if not isinstance(row, dict):
-                continue
-
-            raw_load = row.get("load")
-            load_value = _parse_load_value(raw_load)
-            if load_value is not None and (max_load_value is None or load_value > max_load_value):
-                max_load_value = load_value
-                max_load_raw = None if raw_load is None else str(raw_load)
-
-            raw_reps = row.get("reps")
-            reps_value = _parse_reps_value(raw_reps)
-            if reps_value is not None and (max_reps_value is None or reps_value > max_reps_value):
-                max_reps_value = reps_value
-                max_reps_raw = None if raw_reps is None else str(raw_reps)
+        rows = [row for row in set_details if isinstance(row, dict)]
     else:
-        raw_load = performed.get("load")
-        load_value = _parse_load_value(raw_load)
-        if load_value is not None:
+        rows = [performed]
+
+    raw_loads = [row.get("load") for row in rows]
+    raw_reps = [row.get("reps") for row in rows]
+    for raw_load, load_value in zip(raw_loads, parse_load_column(raw_loads)):
+        if load_value is not None and (max_load_value is None or load_value > max_load_value):
             max_load_value = load_value
             max_load_raw = None if raw_load is None else str(raw_load)
-
-        raw_reps = performed.get("reps")
-        reps_value = _parse_reps_value(raw_reps)
-        if reps_value is not None:
+    for raw_rep, reps_value in zip(raw_reps, parse_reps_column(raw_reps)):
+        if reps_value is not None and (max_reps_value is None or reps_value > max_reps_value):
             max_reps_value = reps_value
-            max_reps_raw = None if raw_reps is None else str(raw_reps)
+            max_reps_raw = None if raw_rep is None else str(raw_rep)
 
     return max_load_value, max_load_raw, max_reps_value, max_reps_raw
 
 
-def _compute_student_evolution(db: Session, student_id: int) -> List[ExerciseEvolutionItem]:
-    # Calcula evolução agregada por exercício:
-    # - Último e melhor registro de carga/reps (máximo por execução)
-    # - Delta (último - anterior), quando houver histórico suficiente
-    rows = (
-        db.query(ExerciseExecution, TrainingExecution.id, TrainingExecution.executed_at, Exercise)
+def _build_exercise_sets(performed: Optional[Dict[str, Any]]) -> List[ExerciseSet]:
+    # Normaliza as séries realizadas (mesma leitura de `_extract_max_load_and_reps`) em linhas de ExerciseSet.
+    if not isinstance(performed, dict):
+        return []
+    rows: List[Tuple[int, Any, Any]] = []
+    set_details = performed.get("set_details")
+    if isinstance(set_details, list):
+        for index, row in enumerate(set_details):
+            if isinstance(row, dict):
+                rows.append((index, row.get("load"), row.get("reps")))
+    elif performed.get("load") is not None or performed.get("reps") is not None:
+        rows.append((0, performed.get("load"), performed.get("reps")))
+
+    load_values = parse_load_column([raw_load for _, raw_load, _ in rows])
+    reps_values = parse_reps_column([raw_reps for _, _, raw_reps in rows])
+    return [
+        ExerciseSet(
+            set_index=index,
+            load_raw=None if raw_load is None else str(raw_load),
+            load_kg=load_kg,
+            reps_raw=None if raw_reps is None else str(raw_reps),
+            reps=reps,
+        )
+        for (index, raw_load, raw_reps), load_kg, reps in zip(rows, load_values, reps_values)
+    ]
+
+
+def _backfill_exercise_sets(db: Session, batch_size: int = 1000) -> int:
+    # Preenche exercise_sets para execuções gravadas antes da tabela existir (idempotente).
+    total = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(ExerciseExecution)
+            .filter(ExerciseExecution.id > last_id)
+            .filter(~ExerciseExecution.sets.any())
+            .order_by(ExerciseExecution.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return total
+        for ex_exec in batch:
+            _, performed = _parse_execution_item(ex_exec.data)
+            for exercise_set in _build_exercise_sets(performed):
+                exercise_set.exercise_execution_id = ex_exec.id
+                db.add(exercise_set)
+                total += 1
+        last_id = batch[-1].id
+        db.commit()
+
+
+def _reparse_exercise_sets(db: Session, batch_size: int = 5000) -> int:
+    # Reinterpreta load_kg/reps a partir do texto bruto já normalizado (após mudanças no parser).
+    total = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(ExerciseSet.id, ExerciseSet.load_raw, ExerciseSet.reps_raw)
+            .filter(ExerciseSet.id > last_id)
+            .order_by(ExerciseSet.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return total
+        load_values = parse_load_column([row.load_raw for row in batch])
+        reps_values = parse_reps_column([row.reps_raw for row in batch])
+        db.execute(
+            update(ExerciseSet),
+            [
+                {"id": row.id, "load_kg": load_kg, "reps": reps}
+                for row, load_kg, reps in zip(batch, load_values, reps_values)
+            ],
+        )
+        total += len(batch)
+        last_id = batch[-1].id
+        db.commit()
+
+
+def _merge_measurement(current: Dict[str, Any], other: Dict[str, Any]) -> None:
+    # Mantém em `current` o maior valor de carga/reps entre as duas medições (empate: fica o primeiro).
+    if other["max_load_value"] is not None and (
+        current["max_load_value"] is None or other["max_load_value"] > current["max_load_value"]
+    ):
+        current["max_load_value"] = other["max_load_value"]
+        current["max_load_raw"] = other["max_load_raw"]
+    if other["max_reps_value"] is not None and (
+        current["max_reps_value"] is None or other["max_reps_value"] > current["max_reps_value"]
+    ):
+        current["max_reps_value"] = other["max_reps_value"]
+        current["max_reps_raw"] = other["max_reps_raw"]
+    if other["performed_item_id"] is not None and (
+        current["performed_item_id"] is None or other["performed_item_id"] > current["performed_item_id"]
+    ):
+        current["performed_item_id"] = other["performed_item_id"]
+
+
+def _has_performed_data(performed: Optional[Dict[str, Any]]) -> bool:
+    # Execução com dados realizados úteis para pré-preencher carga/reps na UI.
+    if not performed or not isinstance(performed, dict):
+        return False
+    return any(key in performed for key in ("set_details", "load", "reps"))
+
+
+def _item_measurement(ex_exec: ExerciseExecution, exec_id: int, executed_at: Optional[datetime]) -> Dict[str, Any]:
+    # Resumo (máximo de carga/reps) de um ExerciseExecution.
+    _, performed = _parse_execution_item(ex_exec.data)
+    max_load_value, max_load_raw, max_reps_value, max_reps_raw = _extract_max_load_and_reps(performed)
+    return {
+        "exec_id": exec_id,
+        "executed_at": executed_at,
+        "item_id": ex_exec.id,
+        "max_load_value": max_load_value,
+        "max_load_raw": max_load_raw,
+        "max_reps_value": max_reps_value,
+        "max_reps_raw": max_reps_raw,
+        "performed_item_id": ex_exec.id if _has_performed_data(performed) else None,
+    }
+
+
+def _evolution_from_measurements(
+    student_id: int, exercise_id: int, items: List[Dict[str, Any]]
+) -> StudentExerciseEvolution:
+    # Monta o agregado de um exercício a partir das medições por execução, em ordem cronológica.
+    items.sort(key=lambda x: (x.get("executed_at") or datetime.min, x.get("exec_id") or 0))
+    row = StudentExerciseEvolution(student_id=student_id, exercise_id=exercise_id, total_executions=0)
+    row.first_item_id = min(it["item_id"] for it in items)
+    for it in items:
+        _push_evolution_measurement(row, it)
+    return row
+
+
+def _push_evolution_measurement(row: StudentExerciseEvolution, item: Dict[str, Any]) -> None:
+    # Aplica uma nova medição (mais recente que todas as anteriores) ao agregado:
+    # a última vira anterior, a nova vira última e o melhor registro é atualizado.
+    if row.last_execution_id is not None:
+        row.prev_load = row.last_load
+        row.prev_load_value = row.last_load_value
+        row.prev_reps = row.last_reps
+        row.prev_reps_value = row.last_reps_value
+    row.last_execution_id = item["exec_id"]
+    row.last_executed_at = item["executed_at"]
+    row.last_load = item["max_load_raw"]
+    row.last_load_value = item["max_load_value"]
+    row.last_reps = item["max_reps_raw"]
+    row.last_reps_value = item["max_reps_value"]
+
+    if item["max_load_value"] is not None and (
+        row.best_load_value is None or item["max_load_value"] > row.best_load_value
+    ):
+        row.best_load = item["max_load_raw"]
+        row.best_load_value = item["max_load_value"]
+    if item["max_reps_value"] is not None and (
+        row.best_reps_value is None or item["max_reps_value"] > row.best_reps_value
+    ):
+        row.best_reps = item["max_reps_raw"]
+        row.best_reps_value = item["max_reps_value"]
+    row.total_executions = (row.total_executions or 0) + 1
+    if item["performed_item_id"] is not None:
+        row.last_performed_item_id = item["performed_item_id"]
+        row.last_performed_at = item["executed_at"]
+
+
+def _rebuild_evolution(db: Session, student_ids: List[int], exercise_ids: Optional[List[int]] = None) -> int:
+    # Recalcula o agregado de evolução a partir do histórico bruto (todas as execuções), para vários
+    # alunos em uma única consulta. Usado pelo comando de manutenção, pela migração de dados que calcula
+    # os históricos antigos (`run_migrations`) e quando uma execução chega fora de ordem cronológica.
+    query = (
+        db.query(
+            ExerciseExecution,
+            TrainingExecution.student_id,
+            TrainingExecution.id,
+            TrainingExecution.executed_at,
+            Exercise.id,
+        )
         .join(TrainingExecution, TrainingExecution.id == ExerciseExecution.training_execution_id)
         .join(TrainingSessionExercise, TrainingSessionExercise.id == ExerciseExecution.session_exercise_id)
         .join(Exercise, Exercise.id == TrainingSessionExercise.exercise_id)
-        .filter(TrainingExecution.student_id == student_id)
-        .order_by(TrainingExecution.executed_at.asc(), TrainingExecution.id.asc(), ExerciseExecution.id.asc())
-        .all()
+        .filter(TrainingExecution.student_id.in_(student_ids))
     )
+    cleanup = db.query(StudentExerciseEvolution).filter(StudentExerciseEvolution.student_id.in_(student_ids))
+    if exercise_ids is not None:
+        query = query.filter(Exercise.id.in_(exercise_ids))
+        cleanup = cleanup.filter(StudentExerciseEvolution.exercise_id.in_(exercise_ids))
+    rows = query.order_by(
+        TrainingExecution.executed_at.asc(), TrainingExecution.id.asc(), ExerciseExecution.id.asc()
+    ).all()
+
+    # Agrega por (aluno, exercício, execução) para não duplicar caso o mesmo exercício apareça mais de uma vez na sessão.
+    measurements: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+    for ex_exec, student_id, exec_id, executed_at, exercise_id in rows:
+        item = _item_measurement(ex_exec, exec_id, executed_at)
+        current = measurements.get((student_id, exercise_id, exec_id))
+        if not current:
+            measurements[(student_id, exercise_id, exec_id)] = item
+        else:
+            _merge_measurement(current, item)
 
-    # Agrega por (exercício, execução) para não duplicar caso o mesmo exercício apareça mais de uma vez na sessão.
-    measurements: Dict[Tuple[int, int], Dict[str, Any]] = {}
-    exercise_info: Dict[int, Dict[str, Any]] = {}
+    per_exercise: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+    for (student_id, exercise_id, _), item in measurements.items():
+        per_exercise.setdefault((student_id, exercise_id), []).append(item)
 
-    for ex_exec, exec_id, executed_at, exercise in rows:
-        if not exercise:
+    cleanup.delete()
+    for (student_id, exercise_id), items in per_exercise.items():
+        db.add(_evolution_from_measurements(student_id, exercise_id, items))
+    db.flush()
+    return len(per_exercise)
+
+
+def _rebuild_student_evolution(db: Session, student_id: int, exercise_ids: Optional[List[int]] = None) -> int:
+    return _rebuild_evolution(db, [student_id], exercise_ids)
+
+
+def _apply_execution_to_evolution(
+    db: Session,
+    execu: TrainingExecution,
+    items: List[Tuple[ExerciseExecution, int]],
+) -> List[int]:
+    # Atualiza o agregado de evolução com uma execução recém-gravada (itens + exercise_id de cada um).
+    # Caso normal (execução mais recente do aluno): O(exercícios da sessão), sem reler o histórico.
+    # Retorna os exercícios em que a execução é anterior à última registrada: esses precisam ser
+    # recalculados a partir do histórico (ver `_apply_execution_aggregates`).
+    measurements: Dict[int, Dict[str, Any]] = {}
+    for ex_exec, exercise_id in items:
+        item = _item_measurement(ex_exec, execu.id, execu.executed_at)
+        current = measurements.get(exercise_id)
+        if not current:
+            measurements[exercise_id] = item
+        else:
+            _merge_measurement(current, item)
+    if not measurements:
+        return []
+
+    # Exercícios sem agregado ganham uma linha vazia antes (ON CONFLICT DO NOTHING): dois treinos gravados
+    # ao mesmo tempo não tentam inserir a mesma linha. O FOR UPDATE serializa as atualizações no PostgreSQL.
+    seed = dialect_insert(db, StudentExerciseEvolution).values(
+        [
+            {"student_id": execu.student_id, "exercise_id": exercise_id, "total_executions": 0}
+            for exercise_id in measurements
+        ]
+    )
+    db.execute(seed.on_conflict_do_nothing(index_elements=["student_id", "exercise_id"]))
+    rows = (
+        db.query(StudentExerciseEvolution)
+        .filter(StudentExerciseEvolution.student_id == execu.student_id)
+        .filter(StudentExerciseEvolution.exercise_id.in_(list(measurements.keys())))
+        .with_for_update()
+        .all()
+    )
+    out_of_order: List[int] = []
+    for row in rows:
+        item = measurements[row.exercise_id]
+        if row.first_item_id is None:
+            row.first_item_id = item["item_id"]
+        if row.last_executed_at is not None and (
+            (execu.executed_at, execu.id) < (row.last_executed_at, row.last_execution_id or 0)
+        ):
+            out_of_order.append(row.exercise_id)
             continue
-        exercise_info.setdefault(
-            exercise.id,
-            {"name": exercise.name, "type": exercise.type, "group": exercise.group},
+        _push_evolution_measurement(row, item)
+    return out_of_order
+
+
+def _evolution_row_to_item(row: StudentExerciseEvolution, exercise: Exercise) -> ExerciseEvolutionItem:
+    delta_load_value = (
+        (row.last_load_value - row.prev_load_value)
+        if row.last_load_value is not None and row.prev_load_value is not None
+        else None
+    )
+    delta_reps_value = (
+        (row.last_reps_value - row.prev_reps_value)
+        if row.last_reps_value is not None and row.prev_reps_value is not None
+        else None
+    )
+    return ExerciseEvolutionItem.model_construct(
+        exercise_id=row.exercise_id,
+        name=exercise.name,
+        type=exercise.type,
+        group=exercise.group,
+        last_executed_at=row.last_executed_at,
+        last_load=row.last_load,
+        last_load_value=row.last_load_value,
+        best_load=row.best_load,
+        best_load_value=row.best_load_value,
+        prev_load=row.prev_load,
+        prev_load_value=row.prev_load_value,
+        delta_load_value=delta_load_value,
+        last_reps=row.last_reps,
+        last_reps_value=row.last_reps_value,
+        best_reps=row.best_reps,
+        best_reps_value=row.best_reps_value,
+        prev_reps=row.prev_reps,
+        prev_reps_value=row.prev_reps_value,
+        delta_reps_value=delta_reps_value,
+        total_executions=row.total_executions or 0,
+    )
+
+
+def _query_student_evolution(db: Session, student_id: int):
+    return (
+        db.query(StudentExerciseEvolution, Exercise)
+        .join(Exercise, Exercise.id == StudentExerciseEvolution.exercise_id)
+        .filter(StudentExerciseEvolution.student_id == student_id)
+        # Sem dados numéricos de carga/reps registrados para o exercício, ele não entra na evolução.
+        .filter(
+            or_(
+                StudentExerciseEvolution.best_load_value.isnot(None),
+                StudentExerciseEvolution.best_reps_value.isnot(None),
+            )
         )
-        _, performed = _parse_execution_item(ex_exec.data)
-        max_load_value, max_load_raw, max_reps_value, max_reps_raw = _extract_max_load_and_reps(performed)
+        # Mais recente primeiro
+        .order_by(StudentExerciseEvolution.last_executed_at.desc(), StudentExerciseEvolution.first_item_id.asc())
+        .all()
+    )
 
-        key = (exercise.id, exec_id)
-        current = measurements.get(key)
-        if not current:
-            measurements[key] = {
-                "exec_id": exec_id,
-                "executed_at": executed_at,
-                "max_load_value": max_load_value,
-                "max_load_raw": max_load_raw,
-                "max_reps_value": max_reps_value,
-                "max_reps_raw": max_reps_raw,
-            }
-            continue
 
-        if max_load_value is not None and (current["max_load_value"] is None or max_load_value > current["max_load_value"]):
-            current["max_load_value"] = max_load_value
-            current["max_load_raw"] = max_load_raw
-        if max_reps_value is not None and (current["max_reps_value"] is None or max_reps_value > current["max_reps_value"]):
-            current["max_reps_value"] = max_reps_value
-            current["max_reps_raw"] = max_reps_raw
-
-    per_exercise: Dict[int, List[Dict[str, Any]]] = {}
-    for (exercise_id, _), item in measurements.items():
-        per_exercise.setdefault(exercise_id, []).append(item)
-
-    result: List[ExerciseEvolutionItem] = []
-    for exercise_id, items in per_exercise.items():
-        info = exercise_info.get(exercise_id) or {"name": "Exercício", "type": None, "group": None}
-        items.sort(key=lambda x: (x.get("executed_at") or datetime.min, x.get("exec_id") or 0))
-
-        last = items[-1] if items else None
-        prev = items[-2] if len(items) >= 2 else None
-
-        best_load_item = None
-        best_reps_item = None
-        for it in items:
-            if it.get("max_load_value") is not None and (
-                best_load_item is None or it["max_load_value"] > best_load_item["max_load_value"]
-            ):
-                best_load_item = it
-            if it.get("max_reps_value") is not None and (
-                best_reps_item is None or it["max_reps_value"] > best_reps_item["max_reps_value"]
-            ):
-                best_reps_item = it
-
-        if best_load_item is None and best_reps_item is None:
-            # Sem dados numéricos de carga/reps registrados para este exercício.
-            continue
+def _query_last_performances(db: Session, student_id: int):
+    return (
+        db.query(ExerciseExecution, StudentExerciseEvolution.last_performed_at, Exercise)
+        .select_from(StudentExerciseEvolution)
+        .join(ExerciseExecution, ExerciseExecution.id == StudentExerciseEvolution.last_performed_item_id)
+        .join(Exercise, Exercise.id == StudentExerciseEvolution.exercise_id)
+        .filter(StudentExerciseEvolution.student_id == student_id)
+        .order_by(
+            StudentExerciseEvolution.last_performed_at.desc(),
+            StudentExerciseEvolution.last_performed_item_id.desc(),
+        )
+        .all()
+    )
 
-        last_load_value = last.get("max_load_value") if last else None
-        prev_load_value = prev.get("max_load_value") if prev else None
-        delta_load_value = (
-            (last_load_value - prev_load_value)
-            if last_load_value is not None and prev_load_value is not None
-            else None
+
+def _compute_student_evolution(db: Session, student_id: int) -> List[ExerciseEvolutionItem]:
+    # Evolução agregada por exercício, lida do agregado mantido na gravação das execuções:
+    # - Último e melhor registro de carga/reps (máximo por execução)
+    # - Delta (último - anterior), quando houver histórico suficiente
+    rows = _query_student_evolution(db, student_id)
+    return [_evolution_row_to_item(row, exercise) for row, exercise in rows]
+
+
+def _compute_cohort_evolution(db: Session, professor_id: int) -> List[StudentEvolutionReport]:
+    # Evolução de todos os alunos do professor de uma vez: mesmas regras de `_compute_student_evolution`,
+    # mas com consultas agrupadas por aluno (em vez de uma evolução + um histórico por aluno).
+    students = (
+        db.query(Student.id, User.name)
+        .join(User, User.id == Student.user_id)
+        .filter(Student.professor_id == professor_id)
+        .order_by(User.name, Student.id)
+        .all()
+    )
+    if not students:
+        return []
+
+    stats = {
+        student_id: (total, last_at)
+        for student_id, total, last_at in db.query(
+            TrainingExecution.student_id,
+            func.count(TrainingExecution.id),
+            func.max(TrainingExecution.executed_at),
         )
+        .join(Student, Student.id == TrainingExecution.student_id)
+        .filter(Student.professor_id == professor_id)
+        .group_by(TrainingExecution.student_id)
+        .all()
+    }
 
-        last_reps_value = last.get("max_reps_value") if last else None
-        prev_reps_value = prev.get("max_reps_value") if prev else None
-        delta_reps_value = (
-            (last_reps_value - prev_reps_value)
-            if last_reps_value is not None and prev_reps_value is not None
-            else None
+    rows = (
+        db.query(StudentExerciseEvolution, Exercise)
+        .join(Exercise, Exercise.id == StudentExerciseEvolution.exercise_id)
+        .join(Student, Student.id == StudentExerciseEvolution.student_id)
+        .filter(Student.professor_id == professor_id)
+        .filter(
+            or_(
+                StudentExerciseEvolution.best_load_value.isnot(None),
+                StudentExerciseEvolution.best_reps_value.isnot(None),
+            )
         )
+        .order_by(
+            StudentExerciseEvolution.student_id,
+            StudentExerciseEvolution.last_executed_at.desc(),
+            StudentExerciseEvolution.first_item_id.asc(),
+        )
+        .all()
+    )
+    evolution_by_student: Dict[int, List[ExerciseEvolutionItem]] = {}
+    for row, exercise in rows:
+        evolution_by_student.setdefault(row.student_id, []).append(_evolution_row_to_item(row, exercise))
 
+    result: List[StudentEvolutionReport] = []
+    for student_id, name in students:
+        total, last_at = stats.get(student_id, (0, None))
         result.append(
-            ExerciseEvolutionItem(
-                exercise_id=exercise_id,
-                name=info["name"],
-                type=info["type"],
-                group=info["group"],
-                last_executed_at=last.get("executed_at") if last else None,
-                last_load=last.get("max_load_raw") if last else None,
-                last_load_value=last_load_value,
-                best_load=best_load_item.get("max_load_raw") if best_load_item else None,
-                best_load_value=best_load_item.get("max_load_value") if best_load_item else None,
-                prev_load=prev.get("max_load_raw") if prev else None,
-                prev_load_value=prev_load_value,
-                delta_load_value=delta_load_value,
-                last_reps=last.get("max_reps_raw") if last else None,
-                last_reps_value=last_reps_value,
-                best_reps=best_reps_item.get("max_reps_raw") if best_reps_item else None,
-                best_reps_value=best_reps_item.get("max_reps_value") if best_reps_item else None,
-                prev_reps=prev.get("max_reps_raw") if prev else None,
-                prev_reps_value=prev_reps_value,
-                delta_reps_value=delta_reps_value,
-                total_executions=len(items),
+            StudentEvolutionReport(
+                student_id=student_id,
+                name=name,
+                total_executions=total,
+                last_executed_at=last_at,
+                exercises=evolution_by_student.get(student_id, []),
             )
         )
-
-    # Mais recente primeiro
-    result.sort(key=lambda x: (x.last_executed_at or datetime.min), reverse=True)
     return result
 
 
-def _execution_to_payload(db: Session, execu: TrainingExecution) -> TrainingExecutionReport:
-    # Converte uma execução do banco para o formato usado na UI.
-    # Preferimos os itens de ExerciseExecution (snapshot + performed). Se não existirem (execuções antigas),
-    # fazemos fallback para os itens atuais da sessão (sem performed).
-    session = execu.session or db.get(TrainingSession, execu.session_id)
-    plan = db.get(TrainingPlan, session.plan_id) if session else None
-    exercises: List[ExecutionExerciseBrief] = []
-
-    exec_items = (
-        db.query(ExerciseExecution)
-        .filter(ExerciseExecution.training_execution_id == execu.id)
-        .order_by(ExerciseExecution.id)
+ROLLUP_BUCKETS = ("week", "month")
+
+
+def _bucket_start(executed_at: datetime, bucket: str) -> datetime:
+    # Início do período: segunda-feira 00:00 (semana) ou dia 1 00:00 (mês).
+    day = datetime(executed_at.year, executed_at.month, executed_at.day)
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _estimate_1rm(load_kg: Optional[float], reps: Optional[float]) -> Optional[float]:
+    # 1RM estimado pela fórmula de Epley: carga × (1 + reps / 30).
+    if load_kg is None or reps is None or load_kg <= 0 or reps <= 0:
+        return None
+    if reps == 1:
+        return load_kg
+    return load_kg * (1 + reps / 30)
+
+
+def _max_optional(current: Optional[float], values: List[float]) -> Optional[float]:
+    candidates = values + ([current] if current is not None else [])
+    return max(candidates) if candidates else None
+
+
+def _accumulate_rollups(
+    acc: Dict[Tuple[str, datetime, int], Dict[str, Any]],
+    executed_at: datetime,
+    exercise_id: int,
+    sets: List[Tuple[Optional[float], Optional[float]]],
+) -> None:
+    # Soma as séries (carga, reps) de um exercício em uma execução nos períodos semanal e mensal.
+    total_reps = sum(reps for _, reps in sets if reps is not None)
+    tonnage = sum(load * reps for load, reps in sets if load is not None and reps is not None)
+    loads = [load for load, _ in sets if load is not None]
+    e1rms = [e for e in (_estimate_1rm(load, reps) for load, reps in sets) if e is not None]
+    for bucket in ROLLUP_BUCKETS:
+        key = (bucket, _bucket_start(executed_at, bucket), exercise_id)
+        current = acc.setdefault(
+            key,
+            {
+                "executions": 0,
+                "total_sets": 0,
+                "total_reps": 0.0,
+                "tonnage_kg": 0.0,
+                "best_load_kg": None,
+                "best_e1rm_kg": None,
+            },
+        )
+        current["executions"] += 1
+        current["total_sets"] += len(sets)
+        current["total_reps"] += total_reps
+        current["tonnage_kg"] += tonnage
+        current["best_load_kg"] = _max_optional(current["best_load_kg"], loads)
+        current["best_e1rm_kg"] = _max_optional(current["best_e1rm_kg"], e1rms)
+
+
+def _merge_rollup(row: ExerciseVolumeRollup, delta: Dict[str, Any]) -> None:
+    row.executions = (row.executions or 0) + delta["executions"]
+    row.total_sets = (row.total_sets or 0) + delta["total_sets"]
+    row.total_reps = (row.total_reps or 0) + delta["total_reps"]
+    row.tonnage_kg = (row.tonnage_kg or 0) + delta["tonnage_kg"]
+    if delta["best_load_kg"] is not None:
+        row.best_load_kg = _max_optional(row.best_load_kg, [delta["best_load_kg"]])
+    if delta["best_e1rm_kg"] is not None:
+        row.best_e1rm_kg = _max_optional(row.best_e1rm_kg, [delta["best_e1rm_kg"]])
+
+
+def _max_nullable(current, incoming):
+    # Maior dos dois valores ignorando NULL, em SQL portável (max() do SQLite e greatest() do PostgreSQL
+    # tratam NULL de formas diferentes).
+    return case(
+        (incoming.is_(None), current),
+        (current.is_(None), incoming),
+        (incoming > current, incoming),
+        else_=current,
+    )
+
+
+def _apply_execution_to_rollups(
+    db: Session,
+    execu: TrainingExecution,
+    items: List[Tuple[ExerciseExecution, int]],
+) -> None:
+    # Soma as séries da execução nos períodos (semana/mês) correspondentes. Como os agregados são
+    # somas/máximos, a ordem de chegada das execuções não importa.
+    sets_by_exercise: Dict[int, List[Tuple[Optional[float], Optional[float]]]] = {}
+    for ex_exec, exercise_id in items:
+        sets_by_exercise.setdefault(exercise_id, []).extend((s.load_kg, s.reps) for s in ex_exec.sets)
+    acc: Dict[Tuple[str, datetime, int], Dict[str, Any]] = {}
+    for exercise_id, sets in sets_by_exercise.items():
+        _accumulate_rollups(acc, execu.executed_at, exercise_id, sets)
+    if not acc:
+        return
+
+    # Upsert aditivo: dois treinos gravados ao mesmo tempo no mesmo período somam na mesma linha
+    # em vez de disputarem a inserção dela.
+    stmt = dialect_insert(db, ExerciseVolumeRollup).values(
+        [
+            {
+                "student_id": execu.student_id,
+                "bucket": bucket,
+                "bucket_start": bucket_start,
+                "exercise_id": exercise_id,
+                **delta,
+            }
+            for (bucket, bucket_start, exercise_id), delta in acc.items()
+        ]
+    )
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id", "bucket", "bucket_start", "exercise_id"],
+        set_={
+            "executions": ExerciseVolumeRollup.executions + excluded.executions,
+            "total_sets": ExerciseVolumeRollup.total_sets + excluded.total_sets,
+            "total_reps": ExerciseVolumeRollup.total_reps + excluded.total_reps,
+            "tonnage_kg": ExerciseVolumeRollup.tonnage_kg + excluded.tonnage_kg,
+            "best_load_kg": _max_nullable(ExerciseVolumeRollup.best_load_kg, excluded.best_load_kg),
+            "best_e1rm_kg": _max_nullable(ExerciseVolumeRollup.best_e1rm_kg, excluded.best_e1rm_kg),
+            "updated_at": datetime.utcnow(),
+        },
+    )
+    db.execute(stmt)
+
+
+def _rebuild_student_rollups(db: Session, student_id: int) -> int:
+    # Recalcula as séries de volume do aluno a partir de exercise_sets (sem decodificar JSON).
+    rows = (
+        db.query(
+            TrainingExecution.id,
+            TrainingExecution.executed_at,
+            TrainingSessionExercise.exercise_id,
+            ExerciseSet.load_kg,
+            ExerciseSet.reps,
+        )
+        .select_from(ExerciseExecution)
+        .join(TrainingExecution, TrainingExecution.id == ExerciseExecution.training_execution_id)
+        .join(TrainingSessionExercise, TrainingSessionExercise.id == ExerciseExecution.session_exercise_id)
+        .outerjoin(ExerciseSet, ExerciseSet.exercise_execution_id == ExerciseExecution.id)
+        .filter(TrainingExecution.student_id == student_id)
+        .filter(TrainingExecution.executed_at.isnot(None))
+        .order_by(ExerciseExecution.id, ExerciseSet.set_index)
         .all()
     )
+    # Agrupa as séries por (execução, exercício): vários itens do mesmo exercício na mesma
+    # execução contam como uma execução do exercício, como no caminho incremental.
+    per_execution: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for exec_id, executed_at, exercise_id, load_kg, reps in rows:
+        entry = per_execution.setdefault((exec_id, exercise_id), {"executed_at": executed_at, "sets": []})
+        if load_kg is not None or reps is not None:
+            entry["sets"].append((load_kg, reps))
+
+    acc: Dict[Tuple[str, datetime, int], Dict[str, Any]] = {}
+    for (_, exercise_id), entry in per_execution.items():
+        _accumulate_rollups(acc, entry["executed_at"], exercise_id, entry["sets"])
+
+    db.query(ExerciseVolumeRollup).filter(ExerciseVolumeRollup.student_id == student_id).delete()
+    for (bucket, bucket_start, exercise_id), delta in acc.items():
+        row = ExerciseVolumeRollup(
+            student_id=student_id,
+            bucket=bucket,
+            bucket_start=bucket_start,
+            exercise_id=exercise_id,
+        )
+        _merge_rollup(row, delta)
+        db.add(row)
+    db.flush()
+    return len(acc)
+
+
+def _apply_execution_aggregates(
+    db: Session,
+    executions: List[Tuple[TrainingExecution, List[Tuple[ExerciseExecution, Optional[int]]]]],
+) -> None:
+    # Atualiza os dados derivados (evolução e séries de volume) com execuções já gravadas (flush), na mesma
+    # transação, em ordem cronológica. Exercícios que receberam alguma execução anterior à última registrada
+    # são recalculados do histórico uma única vez no fim: o recálculo já inclui todas as execuções do lote,
+    # então nenhuma é somada duas vezes.
+    out_of_order: Dict[int, Set[int]] = {}
+    for execu, created in sorted(executions, key=lambda pair: (pair[0].executed_at, pair[0].id)):
+        items = [(ex_exec, ex_id) for ex_exec, ex_id in created if ex_id]
+        stale = _apply_execution_to_evolution(db, execu, items)
+        if stale:
+            out_of_order.setdefault(execu.student_id, set()).update(stale)
+        _apply_execution_to_rollups(db, execu, items)
+        # Sem autoflush: grava as alterações desta execução antes da próxima (e do recálculo) consultar o banco.
+        db.flush()
+    for student_id, exercise_ids in out_of_order.items():
+        _rebuild_student_evolution(db, student_id, sorted(exercise_ids))
+
+
+def _volume_series(
+    db: Session,
+    student_id: int,
+    bucket: str,
+    exercise_id: Optional[int],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+) -> List[ExerciseVolumeSeriesItem]:
+    q = (
+        db.query(ExerciseVolumeRollup, Exercise)
+        .join(Exercise, Exercise.id == ExerciseVolumeRollup.exercise_id)
+        .filter(ExerciseVolumeRollup.student_id == student_id)
+        .filter(ExerciseVolumeRollup.bucket == bucket)
+    )
+    if exercise_id is not None:
+        q = q.filter(ExerciseVolumeRollup.exercise_id == exercise_id)
+    if date_from is not None:
+        q = q.filter(ExerciseVolumeRollup.bucket_start >= _bucket_start(date_from, bucket))
+    if date_to is not None:
+        q = q.filter(ExerciseVolumeRollup.bucket_start <= date_to)
+    rows = q.order_by(ExerciseVolumeRollup.bucket_start.asc(), ExerciseVolumeRollup.exercise_id.asc()).all()
+    return [
+        ExerciseVolumeSeriesItem(
+            exercise_id=row.exercise_id,
+            name=exercise.name,
+            type=exercise.type,
+            group=exercise.group,
+            bucket_start=row.bucket_start,
+            executions=row.executions,
+            total_sets=row.total_sets,
+            total_reps=row.total_reps,
+            tonnage_kg=row.tonnage_kg,
+            best_load_kg=row.best_load_kg,
+            best_e1rm_kg=row.best_e1rm_kg,
+        )
+        for row, exercise in rows
+    ]
 
-    if exec_items:
-        for item in exec_items:
-            snapshot, performed = _parse_execution_item(item.data)
-            sess_ex = item.session_exercise or db.get(TrainingSessionExercise, item.session_exercise_id)
-            ex_obj = sess_ex.exercise if sess_ex else None
 
-            order_value = (
-                (snapshot or {}).get("order")
-                or (sess_ex.order if sess_ex else None)
-                or 0
-            )
-            name_value = (
-                (snapshot or {}).get("exercise_name")
-                or (ex_obj.name if ex_obj else "Exercício")
-            )
-            type_value = (
-                (snapshot or {}).get("exercise_type")
-                or (ex_obj.type if ex_obj else None)
-            )
+def _chunked(values: List[int], size: int = 500):
+    # Divide listas grandes de ids para não estourar o limite de parâmetros do banco em cláusulas IN.
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
 
-            exercises.append(
-                ExecutionExerciseBrief(
-                    id=item.session_exercise_id,
-                    order=order_value,
-                    name=name_value,
-                    type=type_value,
-                    exercise_id=(snapshot or {}).get("exercise_id") or (ex_obj.id if ex_obj else None),
-                    group=(snapshot or {}).get("exercise_group") or (ex_obj.group if ex_obj else None),
-                    prescribed_params=(snapshot or {}).get("prescribed_params"),
-                    performed=performed,
-                    notes=item.notes,
-                )
-            )
-    elif session and session.items:
-        # fallback para execuções antigas que ainda não tinham detalhamento por exercício
-        for item in session.items:
-            if not item.exercise:
-                continue
-            exercises.append(
-                ExecutionExerciseBrief(
-                    id=item.id,
-                    order=item.order,
-                    name=item.exercise.name,
-                    type=item.exercise.type,
-                    exercise_id=item.exercise_id,
-                    group=item.exercise.group,
-                    prescribed_params=_parse_params(item.params),
+
+def _build_execution_reports(db: Session, execs: List[TrainingExecution]) -> List[TrainingExecutionReport]:
+    # Converte várias execuções para o formato da UI com um número fixo de consultas
+    # (itens executados, snapshots, itens da ficha + exercícios, sessões + planos), em vez de N consultas por execução.
+    # Preferimos os itens de ExerciseExecution (snapshot + performed). Se não existirem (execuções antigas),
+    # fazemos fallback para os itens atuais da sessão (sem performed).
+    if not execs:
+        return []
+
+    exec_ids = [e.id for e in execs]
+    items_by_exec: Dict[int, List[ExerciseExecution]] = {}
+    for chunk in _chunked(exec_ids):
+        rows = (
+            db.query(ExerciseExecution)
+            .filter(ExerciseExecution.training_execution_id.in_(chunk))
+            .order_by(ExerciseExecution.id)
+            .all()
+        )
+        for item in rows:
+            items_by_exec.setdefault(item.training_execution_id, []).append(item)
+
+    snapshots = _load_snapshots(
+        db, [i.snapshot_hash for items in items_by_exec.values() for i in items if i.snapshot_hash]
+    )
+
+    session_ids = sorted({e.session_id for e in execs})
+    sessions: Dict[int, Tuple[TrainingSession, Optional[TrainingPlan]]] = {}
+    for chunk in _chunked(session_ids):
+        rows = (
+            db.query(TrainingSession, TrainingPlan)
+            .outerjoin(TrainingPlan, TrainingPlan.id == TrainingSession.plan_id)
+            .filter(TrainingSession.id.in_(chunk))
+            .all()
+        )
+        for sess, plan in rows:
+            sessions[sess.id] = (sess, plan)
+
+    # Itens da ficha referenciados pelas execuções detalhadas.
+    sess_ex_ids = sorted({i.session_exercise_id for items in items_by_exec.values() for i in items})
+    session_exercises: Dict[int, Tuple[TrainingSessionExercise, Optional[Exercise]]] = {}
+    for chunk in _chunked(sess_ex_ids):
+        rows = (
+            db.query(TrainingSessionExercise, Exercise)
+            .outerjoin(Exercise, Exercise.id == TrainingSessionExercise.exercise_id)
+            .filter(TrainingSessionExercise.id.in_(chunk))
+            .all()
+        )
+        for sess_ex, ex_obj in rows:
+            session_exercises[sess_ex.id] = (sess_ex, ex_obj)
+
+    # Itens atuais das sessões, apenas para o fallback de execuções antigas sem detalhamento.
+    legacy_session_ids = sorted({e.session_id for e in execs if e.id not in items_by_exec})
+    legacy_items: Dict[int, List[Tuple[TrainingSessionExercise, Exercise]]] = {}
+    for chunk in _chunked(legacy_session_ids):
+        rows = (
+            db.query(TrainingSessionExercise, Exercise)
+            .join(Exercise, Exercise.id == TrainingSessionExercise.exercise_id)
+            .filter(TrainingSessionExercise.session_id.in_(chunk))
+            .order_by(TrainingSessionExercise.id)
+            .all()
+        )
+        for sess_ex, ex_obj in rows:
+            legacy_items.setdefault(sess_ex.session_id, []).append((sess_ex, ex_obj))
+
+    reports: List[TrainingExecutionReport] = []
+    for execu in execs:
+        session, plan = sessions.get(execu.session_id, (None, None))
+        exercises: List[ExecutionExerciseBrief] = []
+
+        exec_items = items_by_exec.get(execu.id)
+        if exec_items:
+            for item in exec_items:
+                snapshot, performed = _parse_execution_item(item.data, snapshots.get(item.snapshot_hash))
+                sess_ex, ex_obj = session_exercises.get(item.session_exercise_id, (None, None))
+                exercises.append(_exercise_brief(item, snapshot, performed, sess_ex, ex_obj))
+        elif session:
+            # fallback para execuções antigas que ainda não tinham detalhamento por exercício
+            for item, ex_obj in legacy_items.get(session.id, []):
+                exercises.append(
+                    ExecutionExerciseBrief.model_construct(
+                        id=item.id,
+                        order=item.order,
+                        name=ex_obj.name,
+                        type=ex_obj.type,
+                        exercise_id=item.exercise_id,
+                        group=ex_obj.group,
+                        prescribed_params=parse_json(item.params),
+                        performed=None,
+                        notes=None,
+                    )
                 )
-            )
-    return TrainingExecutionReport(
+        reports.append(_execution_report(execu, session, plan, exercises))
+    return reports
+
+
+def _exercise_brief(
+    item: ExerciseExecution,
+    snapshot: Optional[Dict[str, Any]],
+    performed: Optional[Dict[str, Any]],
+    sess_ex: Optional[TrainingSessionExercise],
+    ex_obj: Optional[Exercise],
+) -> ExecutionExerciseBrief:
+    # Item executado no formato da UI: o snapshot tem prioridade sobre o estado atual da ficha/exercício.
+    # Sem validação (model_construct): o tipo vem como texto do snapshot e é convertido para o enum aqui.
+    snapshot = snapshot or {}
+    type_value = snapshot.get("exercise_type") or (ex_obj.type if ex_obj else None)
+    return ExecutionExerciseBrief.model_construct(
+        id=item.session_exercise_id,
+        order=snapshot.get("order") or (sess_ex.order if sess_ex else None) or 0,
+        name=snapshot.get("exercise_name") or (ex_obj.name if ex_obj else "Exercício"),
+        type=ExerciseType(type_value) if type_value is not None else None,
+        exercise_id=snapshot.get("exercise_id") or (ex_obj.id if ex_obj else None),
+        group=snapshot.get("exercise_group") or (ex_obj.group if ex_obj else None),
+        prescribed_params=snapshot.get("prescribed_params"),
+        performed=performed,
+        notes=item.notes,
+    )
+
+
+def _execution_report(
+    execu: TrainingExecution,
+    session: Optional[TrainingSession],
+    plan: Optional[TrainingPlan],
+    exercises: List[ExecutionExerciseBrief],
+) -> TrainingExecutionReport:
+    return TrainingExecutionReport.model_construct(
         id=execu.id,
         student_id=execu.student_id,
         session_id=execu.session_id,
@@ -367,57 +916,297 @@ def _execution_to_payload(db: Session, execu: TrainingExecution) -> TrainingExec
     )
 
 
-def _parse_params(value: Any) -> Optional[Dict[str, Any]]:
-    # Converte JSON guardado como string (ou dict) para dict Python.
-    if value is None:
-        return None
-    if isinstance(value, str):
-        try:
-            return json.loads(value)
-        except Exception:
-            return None
-    if isinstance(value, dict):
-        return value
-    return None
-
-
-def _parse_execution_item(raw: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+def _parse_execution_item(
+    raw: Optional[str], snapshot_raw: Any = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
     # Decodifica o JSON armazenado em ExerciseExecution.data.
+    # `snapshot_raw` é o snapshot deduplicado (prescription_snapshots), quando o item referencia um.
     if not raw:
         return None, None
     try:
-        payload = json.loads(raw) if isinstance(raw, str) else raw
+        payload = loads(raw) if isinstance(raw, str) else raw
     except Exception:
         return None, None
     if not isinstance(payload, dict):
         return None, None
     snapshot = payload.get("snapshot") if isinstance(payload.get("snapshot"), dict) else None
     performed = payload.get("performed") if isinstance(payload.get("performed"), dict) else None
+    if snapshot is None and snapshot_raw:
+        snapshot = parse_json(snapshot_raw)
     return snapshot, performed
 
 
-def _list_active_session_exercises(db: Session, session_id: int) -> List[TrainingSessionExercise]:
-    # Lista apenas itens ativos da ficha (exercícios da sessão) para snapshot/execução.
-    return (
-        db.query(TrainingSessionExercise)
-        .outerjoin(
-            TrainingSessionExerciseMeta,
-            TrainingSessionExerciseMeta.session_exercise_id == TrainingSessionExercise.id,
+def _snapshot_key(snapshot: Dict[str, Any]) -> Tuple[str, str]:
+    # JSON canônico (chaves ordenadas) + SHA-256: snapshots iguais geram o mesmo hash.
+    # (orjson e json padrão só divergem em floats com expoente; no pior caso o snapshot é gravado duas vezes.)
+    data = dumps(snapshot, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest(), data
+
+
+def _store_snapshots(db: Session, snapshots: Dict[str, str]) -> None:
+    # Grava os snapshots ainda inexistentes; conteúdo já presente (mesmo hash) é ignorado pelo banco.
+    if not snapshots:
+        return
+    stmt = dialect_insert(db, PrescriptionSnapshot).on_conflict_do_nothing(index_elements=["hash"])
+    now = datetime.utcnow()
+    db.execute(stmt, [{"hash": h, "data": data, "created_at": now} for h, data in snapshots.items()])
+
+
+def _load_snapshots(db: Session, hashes: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+    # Carrega e decodifica cada snapshot distinto uma única vez.
+    result: Dict[str, Optional[Dict[str, Any]]] = {}
+    for chunk in _chunked(sorted(set(hashes))):
+        for h, data in db.query(PrescriptionSnapshot.hash, PrescriptionSnapshot.data).filter(
+            PrescriptionSnapshot.hash.in_(chunk)
+        ):
+            result[h] = parse_json(data)
+    return result
+
+
+def _compact_snapshots(db: Session, batch_size: int = 1000) -> int:
+    # Move snapshots embutidos em ExerciseExecution.data para prescription_snapshots (idempotente).
+    total = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(ExerciseExecution)
+            .filter(ExerciseExecution.id > last_id)
+            .filter(ExerciseExecution.snapshot_hash.is_(None))
+            .order_by(ExerciseExecution.id)
+            .limit(batch_size)
+            .all()
         )
-        .filter(TrainingSessionExercise.session_id == session_id)
-        .filter(or_(TrainingSessionExerciseMeta.active.is_(None), TrainingSessionExerciseMeta.active.is_(True)))
-        .order_by(TrainingSessionExercise.order, TrainingSessionExercise.id)
+        if not batch:
+            return total
+        snapshots: Dict[str, str] = {}
+        for ex_exec in batch:
+            snapshot, performed = _parse_execution_item(ex_exec.data)
+            if snapshot is None:
+                continue
+            snapshot_hash, snapshot_data = _snapshot_key(snapshot)
+            snapshots[snapshot_hash] = snapshot_data
+            ex_exec.snapshot_hash = snapshot_hash
+            ex_exec.data = dumps({"performed": performed})
+            total += 1
+        _store_snapshots(db, snapshots)
+        last_id = batch[-1].id
+        db.commit()
+
+
+# Paginação do histórico por cursor (keyset) sobre (executed_at, id), do mais recente para o mais antigo.
+# Execuções sem data (executed_at nulo, registros antigos) vêm por último, em todos os bancos.
+# Sem `limit`, as rotas devolvem o histórico inteiro (comportamento original).
+HISTORY_MAX_PAGE_SIZE = 200
+
+
+def _encode_history_cursor(execu: TrainingExecution) -> str:
+    # Data vazia: a página terminou no trecho de execuções sem data.
+    executed_at = execu.executed_at.isoformat() if execu.executed_at is not None else ""
+    raw = f"{executed_at}|{execu.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def _decode_history_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        executed_at, exec_id = raw.rsplit("|", 1)
+        return (datetime.fromisoformat(executed_at) if executed_at else None), int(exec_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def _history_query(
+    db: Session,
+    student_id: int,
+    cursor: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    status: Optional[ExecutionStatus],
+):
+    # Cada página é uma varredura de intervalo no índice (student_id, executed_at, id):
+    # a página N custa o mesmo que a primeira, sem OFFSET.
+    q = db.query(TrainingExecution).filter(TrainingExecution.student_id == student_id)
+    if date_from is not None:
+        q = q.filter(TrainingExecution.executed_at >= date_from)
+    if date_to is not None:
+        q = q.filter(TrainingExecution.executed_at <= date_to)
+    if status is not None:
+        q = q.filter(TrainingExecution.status == status)
+    if cursor:
+        cursor_at, cursor_id = _decode_history_cursor(cursor)
+        if cursor_at is None:
+            q = q.filter(TrainingExecution.executed_at.is_(None), TrainingExecution.id < cursor_id)
+        else:
+            q = q.filter(
+                or_(
+                    TrainingExecution.executed_at < cursor_at,
+                    and_(TrainingExecution.executed_at == cursor_at, TrainingExecution.id < cursor_id),
+                    TrainingExecution.executed_at.is_(None),
+                )
+            )
+    return q.order_by(TrainingExecution.executed_at.desc().nullslast(), TrainingExecution.id.desc())
+
+
+def _query_history_page(
+    db: Session,
+    student_id: int,
+    limit: Optional[int],
+    cursor: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    status: Optional[ExecutionStatus],
+) -> Tuple[List[TrainingExecution], Optional[str]]:
+    q = _history_query(db, student_id, cursor, date_from, date_to, status)
+    if limit is None:
+        return q.all(), None
+
+    # Busca um registro a mais só para saber se existe próxima página.
+    execs = q.limit(limit + 1).all()
+    if len(execs) <= limit:
+        return execs, None
+    execs = execs[:limit]
+    return execs, _encode_history_cursor(execs[-1])
+
+
+# Exportação do histórico em NDJSON (uma execução por linha), com `Accept: application/x-ndjson`.
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_CHUNK_SIZE = 200
+
+
+def _wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _stream_history(
+    student_id: int,
+    limit: Optional[int],
+    cursor: Optional[str],
+    date_from: Optional[datetime],
+    date_to: Optional[datetime],
+    status: Optional[ExecutionStatus],
+) -> StreamingResponse:
+    # Lê as execuções por cursor no servidor (yield_per) e envia cada bloco assim que é montado:
+    # a memória fica limitada a um bloco, independente do tamanho do histórico
+    # (o identity map da sessão guarda referências fracas; blocos já enviados são liberados).
+    if cursor:
+        _decode_history_cursor(cursor)  # cursor inválido vira 400 antes de começar a resposta
+
+    def lines():
+        # Sessão própria: a resposta continua sendo gerada depois que a rota retorna.
+        db = SessionLocal()
+        try:
+            q = _history_query(db, student_id, cursor, date_from, date_to, status)
+            if limit is not None:
+                q = q.limit(limit)
+            chunk: List[TrainingExecution] = []
+            for execu in q.yield_per(STREAM_CHUNK_SIZE):
+                chunk.append(execu)
+                if len(chunk) < STREAM_CHUNK_SIZE:
+                    continue
+                yield "".join(report.model_dump_json() + "\n" for report in _build_execution_reports(db, chunk))
+                chunk = []
+            if chunk:
+                yield "".join(report.model_dump_json() + "\n" for report in _build_execution_reports(db, chunk))
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _list_active_items_by_session(
+    db: Session, session_ids: List[int]
+) -> Dict[int, List[Tuple[TrainingSessionExercise, Optional[Exercise]]]]:
+    # Itens ativos (com o exercício) de várias sessões em uma única consulta.
+    rows = (
+        db.query(TrainingSessionExercise, Exercise)
+        .outerjoin(Exercise, Exercise.id == TrainingSessionExercise.exercise_id)
+        .filter(TrainingSessionExercise.session_id.in_(session_ids))
+        .filter(TrainingSessionExercise.active.is_(True))
+        .order_by(TrainingSessionExercise.session_id, TrainingSessionExercise.order, TrainingSessionExercise.id)
         .all()
     )
+    result: Dict[int, List[Tuple[TrainingSessionExercise, Optional[Exercise]]]] = {}
+    for sess_ex, ex_obj in rows:
+        result.setdefault(sess_ex.session_id, []).append((sess_ex, ex_obj))
+    return result
+
+
+def _validate_performed_exercises(
+    active_items: List[TrainingSessionExercise],
+    provided: Optional[List[ExerciseExecutionIn]],
+) -> Dict[int, ExerciseExecutionIn]:
+    # Valida que o client só está mandando exercícios que pertencem a esta sessão e estão ativos.
+    performed_by_id: Dict[int, ExerciseExecutionIn] = {p.session_exercise_id: p for p in provided or []}
+    if performed_by_id:
+        active_ids = {i.id for i in active_items}
+        invalid = [sess_ex_id for sess_ex_id in performed_by_id.keys() if sess_ex_id not in active_ids]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Exercícios inválidos para esta sessão: {', '.join(map(str, invalid))}",
+            )
+    return performed_by_id
+
+
+def _build_exercise_executions(
+    execu: TrainingExecution,
+    active_items: List[Tuple[TrainingSessionExercise, Optional[Exercise]]],
+    performed_by_id: Dict[int, ExerciseExecutionIn],
+    snapshots: Dict[str, str],
+    briefs: Optional[List[ExecutionExerciseBrief]] = None,
+) -> List[Tuple[ExerciseExecution, Optional[int]]]:
+    # Para cada exercício da sessão, salvamos:
+    # - snapshot (prescrição do professor naquele momento), deduplicado por hash em `snapshots`
+    # - performed (cargas/reps digitadas pelo aluno)
+    # Retorna os itens criados com o exercise_id de cada um (para o agregado de evolução).
+    # Se `briefs` for informado, recebe também os itens no formato da UI (resposta sem reler o banco).
+    created: List[Tuple[ExerciseExecution, Optional[int]]] = []
+    for item, ex_obj in active_items:
+        perf = performed_by_id.get(item.id)
+        performed_payload = perf.performed if perf else None
+        notes = perf.notes if perf else None
+
+        snapshot = {
+            "session_exercise_id": item.id,
+            "order": item.order,
+            "exercise_id": item.exercise_id,
+            "exercise_name": ex_obj.name if ex_obj else None,
+            "exercise_type": ex_obj.type if ex_obj else None,
+            "exercise_group": ex_obj.group if ex_obj else None,
+            "prescribed_params": parse_json(item.params),
+            "session_exercise_notes": item.notes,
+        }
+        snapshot_hash, snapshot_data = _snapshot_key(snapshot)
+        snapshots[snapshot_hash] = snapshot_data
+        ex_exec = ExerciseExecution(
+            training_execution=execu,
+            session_exercise_id=item.id,
+            data=dumps({"performed": performed_payload}),
+            snapshot_hash=snapshot_hash,
+            notes=notes,
+            sets=_build_exercise_sets(performed_payload),
+        )
+        created.append((ex_exec, ex_obj.id if ex_obj else None))
+        if briefs is not None:
+            briefs.append(
+                _exercise_brief(
+                    ex_exec, snapshot, performed_payload if isinstance(performed_payload, dict) else None, item, ex_obj
+                )
+            )
+    return created
 
 
 @router.post("/", response_model=TrainingExecutionReport)
 def create_execution(payload: TrainingExecutionCreate, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
     # Cria uma execução e grava um snapshot de cada exercício da sessão + o que foi realizado (performed).
-    session, _, session_student = _get_session_plan_student(db, payload.session_id)
+    session, plan, session_student = _get_session_plan_student(db, payload.session_id)
 
     if current.type == UserType.ALUNO:
-        student = db.query(Student).filter_by(user_id=current.id).first()
+        # Caso comum: a sessão é do próprio aluno logado (sem consulta extra).
+        if session_student.user_id == current.id:
+            student = session_student
+        else:
+            student = db.query(Student).filter_by(user_id=current.id).first()
         if not student:
             raise HTTPException(status_code=404, detail="Aluno não encontrado")
         if payload.student_id != student.id:
@@ -438,6 +1227,10 @@ def create_execution(payload: TrainingExecutionCreate, db: Session = Depends(get
     else:
         raise HTTPException(status_code=403, detail="Perfil não autorizado")
 
+    # Itens ativos da ficha já com o exercício (uma consulta).
+    active_items = _list_active_items_by_session(db, [session.id]).get(session.id, [])
+    performed_by_id = _validate_performed_exercises([item for item, _ in active_items], payload.exercises)
+
     # Registro principal da execução da sessão (data, status, rpe etc.).
     execu = TrainingExecution(
         student_id=student_id,
@@ -446,121 +1239,235 @@ def create_execution(payload: TrainingExecutionCreate, db: Session = Depends(get
         rpe=payload.rpe,
         comment=payload.comment,
     )
+    snapshots: Dict[str, str] = {}
+    briefs: List[ExecutionExerciseBrief] = []
+    created = _build_exercise_executions(execu, active_items, performed_by_id, snapshots, briefs)
+    _store_snapshots(db, snapshots)
     db.add(execu)
+    db.add_all([ex_exec for ex_exec, _ in created])
+
+    # Um único flush insere a execução, os itens e as séries; os agregados (evolução, séries de volume)
+    # ficam na mesma transação.
     db.flush()
+    _apply_execution_aggregates(db, [(execu, created)])
 
-    active_items = _list_active_session_exercises(db, session.id)
-    provided: List[ExerciseExecutionIn] = payload.exercises or []
-    performed_by_id: Dict[int, ExerciseExecutionIn] = {p.session_exercise_id: p for p in provided}
+    # A resposta é montada com os objetos em memória (antes do commit expirar os atributos).
+    report = _execution_report(execu, session, plan, briefs)
+    db.commit()
+    return report
 
-    if provided:
-        # Valida que o client só está mandando exercícios que pertencem a esta sessão e estão ativos.
-        active_ids = {i.id for i in active_items}
-        invalid = [sess_ex_id for sess_ex_id in performed_by_id.keys() if sess_ex_id not in active_ids]
-        if invalid:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Exercícios inválidos para esta sessão: {', '.join(map(str, invalid))}",
-            )
 
-    # Para cada exercício da sessão, salvamos:
-    # - snapshot (prescrição do professor naquele momento)
-    # - performed (cargas/reps digitadas pelo aluno)
-    for item in active_items:
-        ex_obj = item.exercise or db.get(Exercise, item.exercise_id)
-        perf = performed_by_id.get(item.id)
-        performed_payload = perf.performed if perf else None
-        notes = perf.notes if perf else None
+SYNC_MAX_BATCH = 200
 
-        snapshot = {
-            "session_exercise_id": item.id,
-            "order": item.order,
-            "exercise_id": item.exercise_id,
-            "exercise_name": ex_obj.name if ex_obj else None,
-            "exercise_type": ex_obj.type if ex_obj else None,
-            "exercise_group": ex_obj.group if ex_obj else None,
-            "prescribed_params": _parse_params(item.params),
-            "session_exercise_notes": item.notes,
-        }
-        data = json.dumps({"snapshot": snapshot, "performed": performed_payload}, ensure_ascii=False)
-        db.add(
-            ExerciseExecution(
-                training_execution_id=execu.id,
-                session_exercise_id=item.id,
-                data=data,
-                notes=notes,
-            )
+
+@router.post("/lote", response_model=List[TrainingExecutionSyncResult])
+def sync_executions(
+    payload: List[TrainingExecutionSyncItem],
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    # Sincronização offline: recebe vários treinos registrados sem conexão e grava tudo em uma transação.
+    # Cada treino traz um `client_id` gerado pelo app; reenvios do mesmo treino são ignorados (idempotência).
+    if not payload:
+        return []
+    if len(payload) > SYNC_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"Envie no máximo {SYNC_MAX_BATCH} execuções por lote")
+
+    if current.type == UserType.ALUNO:
+        own_student = db.query(Student).filter_by(user_id=current.id).first()
+        if not own_student:
+            raise HTTPException(status_code=404, detail="Aluno não encontrado")
+    elif current.type != UserType.PROFESSOR:
+        raise HTTPException(status_code=403, detail="Perfil não autorizado")
+
+    # Resolve sessão -> aluno dono do plano para o lote inteiro de uma vez.
+    session_ids = sorted({p.session_id for p in payload})
+    owners: Dict[int, Student] = {
+        session_id: student
+        for session_id, student in db.query(TrainingSession.id, Student)
+        .join(TrainingPlan, TrainingPlan.id == TrainingSession.plan_id)
+        .join(Student, Student.id == TrainingPlan.student_id)
+        .filter(TrainingSession.id.in_(session_ids))
+        .all()
+    }
+    for item in payload:
+        session_student = owners.get(item.session_id)
+        if not session_student:
+            raise HTTPException(status_code=404, detail=f"Sessão {item.session_id} não encontrada")
+        if session_student.id != item.student_id:
+            raise HTTPException(status_code=403, detail=f"Sessão {item.session_id} não pertence ao aluno informado")
+        if current.type == UserType.ALUNO and item.student_id != own_student.id:
+            raise HTTPException(status_code=403, detail="Acesso negado a execuções de outro aluno")
+        if current.type == UserType.PROFESSOR and session_student.professor_id != current.id:
+            raise HTTPException(status_code=403, detail="Aluno não pertence a este professor")
+
+    # Reenvios: treinos já gravados (mesmo aluno + client_id) não são duplicados.
+    client_ids = sorted({p.client_id for p in payload})
+    existing: Dict[Tuple[int, str], int] = {
+        (student_id, client_id): exec_id
+        for exec_id, student_id, client_id in db.query(
+            TrainingExecution.id, TrainingExecution.student_id, TrainingExecution.client_id
         )
+        .filter(TrainingExecution.student_id.in_({p.student_id for p in payload}))
+        .filter(TrainingExecution.client_id.in_(client_ids))
+        .all()
+    }
+
+    active_by_session = _list_active_items_by_session(db, session_ids)
+    now = datetime.utcnow()
+    results: List[Tuple[TrainingExecutionSyncItem, Optional[TrainingExecution]]] = []
+    batch: Dict[Tuple[int, str], TrainingExecution] = {}
+    snapshots: Dict[str, str] = {}
+    new_executions: List[Tuple[TrainingExecution, List[Tuple[ExerciseExecution, Optional[int]]]]] = []
+    for item in payload:
+        key = (item.student_id, item.client_id)
+        if key in existing or key in batch:
+            results.append((item, None))
+            continue
+        active_items = active_by_session.get(item.session_id, [])
+        performed_by_id = _validate_performed_exercises([sess_ex for sess_ex, _ in active_items], item.exercises)
+        execu = TrainingExecution(
+            student_id=item.student_id,
+            session_id=item.session_id,
+            client_id=item.client_id,
+            executed_at=item.executed_at or now,
+            status=item.status,
+            rpe=item.rpe,
+            comment=item.comment,
+        )
+        created = _build_exercise_executions(execu, active_items, performed_by_id, snapshots)
+        db.add(execu)
+        db.add_all([ex_exec for ex_exec, _ in created])
+        new_executions.append((execu, created))
+        results.append((item, execu))
+        batch[key] = execu
 
-    db.commit()
-    db.refresh(execu)
-    return _execution_to_payload(db, execu)
+    try:
+        # Um único flush insere execuções e itens do lote em bloco.
+        _store_snapshots(db, snapshots)
+        db.flush()
+        _apply_execution_aggregates(db, new_executions)
+        db.commit()
+    except IntegrityError:
+        # Outro envio do mesmo lote gravou em paralelo: o cliente pode reenviar com segurança.
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Lote enviado em paralelo; tente novamente")
+
+    output: List[TrainingExecutionSyncResult] = []
+    for item, execu in results:
+        if execu is not None:
+            output.append(TrainingExecutionSyncResult(client_id=item.client_id, execution_id=execu.id))
+            continue
+        key = (item.student_id, item.client_id)
+        exec_id = existing[key] if key in existing else batch[key].id
+        output.append(TrainingExecutionSyncResult(client_id=item.client_id, execution_id=exec_id, duplicate=True))
+    return output
 
 
 @router.get("/aluno/{student_id}", response_model=List[TrainingExecutionReport])
-def list_executions(student_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+def list_executions(
+    student_id: int,
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[NaiveUTCDateTime] = Query(None, alias="from"),
+    date_to: Optional[NaiveUTCDateTime] = Query(None, alias="to"),
+    status: Optional[ExecutionStatus] = None,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
     # Histórico por aluno (professor ou o próprio aluno).
     _ensure_access_student(db, current, student_id)
-    q = db.query(TrainingExecution).filter_by(student_id=student_id)
-    execs = q.order_by(TrainingExecution.executed_at.desc()).all()
-    # Tocar relacionamentos para evitar lazy na serialização
-    for e in execs:
-        _ = e.session
-        if e.session:
-            _ = e.session.items
-    return [_execution_to_payload(db, e) for e in execs]
+    if _wants_ndjson(request):
+        return _stream_history(student_id, limit, cursor, date_from, date_to, status)
+    execs, next_cursor = _query_history_page(db, student_id, limit, cursor, date_from, date_to, status)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return model_response(_REPORT_LIST, _build_execution_reports(db, execs), headers)
 
 
 @router.get("/aluno/{student_id}/evolucao", response_model=List[ExerciseEvolutionItem])
 def student_evolution(student_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
     # Evolução por aluno (professor ou o próprio aluno).
     _ensure_access_student(db, current, student_id)
-    return _compute_student_evolution(db, student_id)
+    return model_response(_EVOLUTION_LIST, _compute_student_evolution(db, student_id))
+
+
+@router.get("/aluno/{student_id}/series", response_model=List[ExerciseVolumeSeriesItem])
+def student_volume_series(
+    student_id: int,
+    bucket: Literal["week", "month"] = "week",
+    exercise_id: Optional[int] = None,
+    date_from: Optional[NaiveUTCDateTime] = Query(None, alias="from"),
+    date_to: Optional[NaiveUTCDateTime] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    # Volume (tonelagem) e 1RM estimado por exercício, agrupados por semana ou mês.
+    _ensure_access_student(db, current, student_id)
+    return _volume_series(db, student_id, bucket, exercise_id, date_from, date_to)
+
+
+@router.get("/professor/coorte", response_model=List[StudentEvolutionReport])
+def professor_cohort_evolution(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+    # Relatório consolidado: evolução de todos os alunos do professor em uma chamada.
+    if current.type != UserType.PROFESSOR:
+        raise HTTPException(status_code=403, detail="Apenas professor pode ver o relatório da turma")
+    return _compute_cohort_evolution(db, current.id)
 
 
 @router.get("/minhas", response_model=List[TrainingExecutionReport])
-def list_my_executions(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+def list_my_executions(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[NaiveUTCDateTime] = Query(None, alias="from"),
+    date_to: Optional[NaiveUTCDateTime] = Query(None, alias="to"),
+    status: Optional[ExecutionStatus] = None,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
     # Histórico do aluno logado.
     student = _get_current_student(db, current)
-    q = db.query(TrainingExecution).filter_by(student_id=student.id)
-    execs = q.order_by(TrainingExecution.executed_at.desc()).all()
-    for e in execs:
-        _ = e.session
-        if e.session:
-            _ = e.session.items
-    return [_execution_to_payload(db, e) for e in execs]
+    if _wants_ndjson(request):
+        return _stream_history(student.id, limit, cursor, date_from, date_to, status)
+    execs, next_cursor = _query_history_page(db, student.id, limit, cursor, date_from, date_to, status)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return model_response(_REPORT_LIST, _build_execution_reports(db, execs), headers)
 
 
 @router.get("/minhas/evolucao", response_model=List[ExerciseEvolutionItem])
 def my_evolution(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
     # Evolução do aluno logado.
     student = _get_current_student(db, current)
-    return _compute_student_evolution(db, student.id)
+    return model_response(_EVOLUTION_LIST, _compute_student_evolution(db, student.id))
+
+
+@router.get("/minhas/series", response_model=List[ExerciseVolumeSeriesItem])
+def my_volume_series(
+    bucket: Literal["week", "month"] = "week",
+    exercise_id: Optional[int] = None,
+    date_from: Optional[NaiveUTCDateTime] = Query(None, alias="from"),
+    date_to: Optional[NaiveUTCDateTime] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    # Séries de volume/1RM estimado do aluno logado.
+    student = _get_current_student(db, current)
+    return _volume_series(db, student.id, bucket, exercise_id, date_from, date_to)
 
 
 @router.get("/minhas/ultimos_exercicios", response_model=List[LastExercisePerformanceItem])
 def my_last_exercises(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
     # Retorna o último desempenho registrado por exercício (para pré-preencher carga/reps na UI).
+    # Lê o ponteiro mantido no agregado de evolução: custo proporcional ao número de exercícios,
+    # não ao tamanho do histórico.
     student = _get_current_student(db, current)
-    rows = (
-        db.query(ExerciseExecution, TrainingExecution.executed_at, Exercise)
-        .join(TrainingExecution, TrainingExecution.id == ExerciseExecution.training_execution_id)
-        .join(TrainingSessionExercise, TrainingSessionExercise.id == ExerciseExecution.session_exercise_id)
-        .join(Exercise, Exercise.id == TrainingSessionExercise.exercise_id)
-        .filter(TrainingExecution.student_id == student.id)
-        .order_by(TrainingExecution.executed_at.desc(), TrainingExecution.id.desc(), ExerciseExecution.id.desc())
-        .all()
-    )
+    rows = _query_last_performances(db, student.id)
 
-    seen: set[int] = set()
     result: List[LastExercisePerformanceItem] = []
     for ex_exec, executed_at, exercise in rows:
-        if not exercise or exercise.id in seen:
-            continue
         _, performed = _parse_execution_item(ex_exec.data)
-        if not performed or not isinstance(performed, dict):
-            continue
-        if not any(key in performed for key in ("set_details", "load", "reps")):
+        if not _has_performed_data(performed):
             continue
         result.append(
             LastExercisePerformanceItem(
@@ -572,5 +1479,4 @@ def my_last_exercises(db: Session = Depends(get_db), current: User = Depends(get
                 performed=performed,
             )
         )
-        seen.add(exercise.id)
     return result
@@ -1,51 +1,160 @@
-from typing import List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+import io
+import uuid
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile
 from fastapi.responses import JSONResponse
-from sqlalchemy import or_
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from ..cache import agenda_cache, library_cache
 from ..database import get_db
-from ..models import Exercise, ExerciseMeta, Student, User, UserType
-from ..schemas import ExerciseCreate, ExerciseOut, ExerciseUpdate
+from ..models import Exercise, ExerciseMeta, ExerciseUsage, Student, User, UserType
+from ..schemas import (
+  ExerciseCreate,
+  ExerciseImportIssue,
+  ExerciseImportResult,
+  ExerciseOut,
+  ExerciseSuggestion,
+  ExerciseUpdate,
+)
+from ..search import exercise_search_query, search_terms
+from ..serialization import NEXT_OFFSET_HEADER, json_bytes_response, loads
 from ..core.security import get_current_user
 
 router = APIRouter()
 
+_LIBRARY_LIST = TypeAdapter(List[ExerciseOut])
+SEARCH_DEFAULT_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SUGGESTIONS_DEFAULT_LIMIT = 10
+SUGGESTIONS_MAX_LIMIT = 50
+# Linhas validadas por INSERT em lote em POST /exercicios/importar.
+IMPORT_BATCH_SIZE = 500
+# Prefixo do ETag da biblioteca: as versões do cache recomeçam quando o processo reinicia.
+_LIBRARY_ETAG_PREFIX = uuid.uuid4().hex[:12]
+
 
 def _get_student(db: Session, user: User) -> Optional[Student]:
   return db.query(Student).filter_by(user_id=user.id).first()
 
-def _attach_active(rows):
-  result = []
-  for ex, active in rows:
-    ex.active = True if active is None else active
-    result.append(ex)
-  return result
 
+def _library_etag(view: str, token: Tuple[int, int]) -> str:
+  return f'"{_LIBRARY_ETAG_PREFIX}-{view}-{token[0]}-{token[1]}"'
 
-@router.get("/", response_model=List[ExerciseOut])
-def list_exercises(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
-  # Professor vê só dele (e globais se professor_id nulo); aluno vê exercícios do professor vinculado (simples).
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+  if not if_none_match:
+    return False
+  candidates = [value.strip() for value in if_none_match.split(",")]
+  return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
+
+
+def _query_library(db: Session, professor_id: int, only_active: bool) -> bytes:
+  query = db.query(Exercise).filter((Exercise.professor_id == professor_id) | (Exercise.professor_id.is_(None)))
+  if only_active:
+    query = query.filter(Exercise.active.is_(True))
+  return _LIBRARY_LIST.dump_json(_LIBRARY_LIST.validate_python(query.all(), from_attributes=True))
+
+
+def _library_owner(db: Session, current: User) -> Optional[Tuple[int, str]]:
+  # (professor dono da biblioteca, visão): professor vê a própria com arquivados; aluno vê a do professor, só ativos.
   if current.type == UserType.PROFESSOR:
-    rows = (
-      db.query(Exercise, ExerciseMeta.active)
-      .outerjoin(ExerciseMeta, ExerciseMeta.exercise_id == Exercise.id)
-      .filter((Exercise.professor_id == current.id) | (Exercise.professor_id.is_(None)))
-      .all()
-    )
-  else:
+    return current.id, "professor"
+  # O vínculo aluno/professor não muda depois do cadastro: fica guardado no próprio cache (user_id -> professor_id).
+  def load_professor_id() -> Optional[int]:
     student = _get_student(db, current)
-    if not student:
-      return []
-    rows = (
-      db.query(Exercise, ExerciseMeta.active)
-      .outerjoin(ExerciseMeta, ExerciseMeta.exercise_id == Exercise.id)
-      .filter((Exercise.professor_id == student.professor_id) | (Exercise.professor_id.is_(None)))
-      .filter(or_(ExerciseMeta.active.is_(None), ExerciseMeta.active.is_(True)))
-      .all()
-    )
-  return _attach_active(rows)
+    return student.professor_id if student else None
+
+  professor_id = library_cache.owner_for(current.id, load_professor_id)
+  if professor_id is None:
+    return None
+  return professor_id, "aluno"
+
+
+@router.get("/", response_model=List[ExerciseOut])
+def list_exercises(
+  db: Session = Depends(get_db),
+  current: User = Depends(get_current_user),
+  if_none_match: Optional[str] = Header(None),
+):
+  # Professor vê só dele (e globais se professor_id nulo); aluno vê exercícios do professor vinculado (simples).
+  # A biblioteca muda pouco: a resposta fica em cache por professor e leva um ETag com a versão do cache.
+  # Cliente com a versão atual recebe 304 sem consulta à biblioteca.
+  owner = _library_owner(db, current)
+  if owner is None:
+    return []
+  professor_id, view = owner
+
+  body, token = library_cache.get(professor_id, view)
+  etag = _library_etag(view, token)
+  headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+  if _etag_matches(if_none_match, etag):
+    return Response(status_code=304, headers=headers)
+  if body is None:
+    body = _query_library(db, professor_id, only_active=view == "aluno")
+    library_cache.set(professor_id, view, body, token)
+  return json_bytes_response(body, headers)
+
+
+@router.get("/busca", response_model=List[ExerciseOut])
+def search_exercises(
+  response: Response,
+  q: str,
+  limit: int = Query(SEARCH_DEFAULT_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+  offset: int = Query(0, ge=0),
+  db: Session = Depends(get_db),
+  current: User = Depends(get_current_user),
+):
+  # Busca na mesma biblioteca de GET /exercicios, ordenada por relevância (ver app/search.py).
+  # Paginação por deslocamento: o header X-Next-Offset traz o `offset` da próxima página. A ordem por relevância
+  # não tem chave estável para keyset, e buscas são curtas (poucas páginas).
+  owner = _library_owner(db, current)
+  terms = search_terms(q)
+  if owner is None or not terms:
+    return []
+  professor_id, view = owner
+
+  query = exercise_search_query(db, terms).where(
+    (Exercise.professor_id == professor_id) | (Exercise.professor_id.is_(None))
+  )
+  if view == "aluno":
+    query = query.where(Exercise.active.is_(True))
+  # Busca um resultado a mais só para saber se existe próxima página.
+  results = db.scalars(query.offset(offset).limit(limit + 1)).all()
+  if len(results) > limit:
+    results = results[:limit]
+    response.headers[NEXT_OFFSET_HEADER] = str(offset + limit)
+  return results
+
+
+@router.get("/sugestoes", response_model=List[ExerciseSuggestion])
+def suggest_exercises(
+  prefix: Optional[str] = None,
+  limit: int = Query(SUGGESTIONS_DEFAULT_LIMIT, ge=1, le=SUGGESTIONS_MAX_LIMIT),
+  db: Session = Depends(get_db),
+  current: User = Depends(get_current_user),
+):
+  # Exercícios que o professor mais prescreve (contadores de exercise_usage), opcionalmente filtrados pelo
+  # início do nome. Lê os contadores pelo índice (professor_id, uses), sem varrer as fichas.
+  if current.type != UserType.PROFESSOR:
+    raise HTTPException(status_code=403, detail="Apenas professor pode ver sugestões de exercícios")
+  query = (
+    db.query(Exercise, ExerciseUsage.uses)
+    .join(ExerciseUsage, ExerciseUsage.exercise_id == Exercise.id)
+    .filter(ExerciseUsage.professor_id == current.id)
+    .filter(Exercise.active.is_(True))
+    .filter((Exercise.professor_id == current.id) | (Exercise.professor_id.is_(None)))
+  )
+  if prefix and prefix.strip():
+    query = query.filter(Exercise.name.istartswith(prefix.strip(), autoescape=True))
+  rows = query.order_by(ExerciseUsage.uses.desc(), Exercise.name, Exercise.id).limit(limit).all()
+  return [
+    ExerciseSuggestion(**ExerciseOut.model_validate(ex).model_dump(), uses=uses)
+    for ex, uses in rows
+  ]
 
 
 @router.post("/", response_model=ExerciseOut)
@@ -64,18 +173,142 @@ def create_exercise(payload: ExerciseCreate, db: Session = Depends(get_db), curr
   )
   db.add(ex)
   db.commit()
+  library_cache.invalidate(current.id)
   db.refresh(ex)
-  ex.active = True
   return ex
 
 
+def _import_format(upload: UploadFile) -> str:
+  filename = (upload.filename or "").lower()
+  content_type = (upload.content_type or "").lower()
+  if filename.endswith(".csv") or content_type == "text/csv":
+    return "csv"
+  if filename.endswith((".jsonl", ".ndjson")) or content_type in ("application/x-ndjson", "application/jsonl"):
+    return "jsonl"
+  raise HTTPException(status_code=400, detail="Formato não suportado: envie um arquivo .csv ou .jsonl")
+
+
+def _import_rows(upload: UploadFile, file_format: str) -> Iterator[Tuple[int, Any]]:
+  # Lê o upload linha a linha (o Starlette guarda o arquivo em disco temporário, não na memória).
+  # Gera (número da linha, dados brutos da linha).
+  stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+  if file_format == "csv":
+    # Cabeçalho com os campos de ExerciseCreate; endurance_params, se houver, vem como JSON.
+    reader = csv.DictReader(stream)
+    for row in reader:
+      # Células vazias ficam de fora para valerem os padrões de ExerciseCreate (ex.: type).
+      data = {
+        key.strip(): value.strip()
+        for key, value in row.items()
+        if key and isinstance(value, str) and value.strip()
+      }
+      if data:
+        yield reader.line_num, data
+  else:
+    for line_number, line in enumerate(stream, start=1):
+      if line.strip():
+        yield line_number, line
+
+
+def _parse_import_row(raw: Any, file_format: str) -> ExerciseCreate:
+  # Erros de JSON e de validação saem como ValueError (ValidationError é subclasse).
+  if file_format == "jsonl":
+    try:
+      data = loads(raw)
+    except ValueError:
+      raise ValueError("JSON inválido")
+    if not isinstance(data, dict):
+      raise ValueError("a linha deve ser um objeto JSON")
+  else:
+    data = raw
+    if data.get("endurance_params"):
+      try:
+        data["endurance_params"] = loads(data["endurance_params"])
+      except ValueError:
+        raise ValueError("endurance_params: JSON inválido")
+  return ExerciseCreate.model_validate(data)
+
+
+def _import_error_detail(exc: ValueError) -> str:
+  if isinstance(exc, ValidationError):
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+  return str(exc)
+
+
+def _exercise_name_key(name: str) -> str:
+  # Chave de duplicidade: ignora caixa e espaços repetidos.
+  return " ".join(name.split()).casefold()
+
+
+@router.post("/importar", response_model=ExerciseImportResult)
+def import_exercises(
+  file: UploadFile = File(...),
+  db: Session = Depends(get_db),
+  current: User = Depends(get_current_user),
+):
+  # Importação em massa (CSV ou JSON lines): valida linha a linha, insere em lotes de IMPORT_BATCH_SIZE e
+  # relata por linha o que foi ignorado. Nome já existente na biblioteca ativa do professor (ou repetido
+  # no próprio arquivo) conta como duplicado. Linhas válidas são gravadas mesmo que outras tenham erro.
+  if current.type != UserType.PROFESSOR:
+    raise HTTPException(status_code=403, detail="Apenas professor pode importar exercícios")
+  file_format = _import_format(file)
+
+  existing = {
+    _exercise_name_key(name)
+    for (name,) in db.query(Exercise.name)
+    .filter(Exercise.professor_id == current.id)
+    .filter(Exercise.active.is_(True))
+  }
+  created = 0
+  duplicates: List[ExerciseImportIssue] = []
+  errors: List[ExerciseImportIssue] = []
+  batch: List[Dict[str, Any]] = []
+
+  def flush_batch() -> None:
+    nonlocal created, batch
+    if batch:
+      db.execute(insert(Exercise).execution_options(render_nulls=True), batch)
+      created += len(batch)
+      batch = []
+
+  try:
+    for line, raw in _import_rows(file, file_format):
+      try:
+        exercise = _parse_import_row(raw, file_format)
+      except ValueError as exc:
+        errors.append(ExerciseImportIssue(line=line, detail=_import_error_detail(exc)))
+        continue
+      key = _exercise_name_key(exercise.name)
+      if not key:
+        errors.append(ExerciseImportIssue(line=line, detail="name: nome obrigatório"))
+        continue
+      if key in existing:
+        duplicates.append(ExerciseImportIssue(line=line, detail=f"Exercício '{exercise.name}' já existe"))
+        continue
+      existing.add(key)
+      batch.append({"professor_id": current.id, **exercise.model_dump()})
+      if len(batch) >= IMPORT_BATCH_SIZE:
+        flush_batch()
+    flush_batch()
+  except UnicodeDecodeError:
+    db.rollback()
+    raise HTTPException(status_code=400, detail="O arquivo deve estar em UTF-8")
+  except csv.Error as exc:
+    db.rollback()
+    raise HTTPException(status_code=400, detail=f"CSV inválido: {exc}")
+
+  db.commit()
+  if created:
+    library_cache.invalidate(current.id)
+  return ExerciseImportResult(created=created, duplicates=duplicates, errors=errors)
+
+
 @router.get("/{exercise_id}/explicacao", response_model=ExerciseOut)
 def explain_exercise(exercise_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
   ex = db.get(Exercise, exercise_id)
   if not ex:
     raise HTTPException(status_code=404, detail="Exercicio nao encontrado")
-  meta = db.get(ExerciseMeta, exercise_id)
-  if meta and meta.active is False:
+  if ex.active is False:
     raise HTTPException(status_code=404, detail="Exercicio arquivado")
   if ex.professor_id is not None:
     if current.type == UserType.PROFESSOR:
@@ -87,7 +320,6 @@ def explain_exercise(exercise_id: int, db: Session = Depends(get_db), current: U
         raise HTTPException(status_code=403, detail="Exercício não pertence ao seu professor")
     else:
       raise HTTPException(status_code=403, detail="Perfil não autorizado")
-  ex.active = True if not meta else meta.active
   return ex
 
 
@@ -103,8 +335,7 @@ def update_exercise(
   ex = db.get(Exercise, exercise_id)
   if not ex:
     raise HTTPException(status_code=404, detail="Exercicio nao encontrado")
-  meta = db.get(ExerciseMeta, exercise_id)
-  if meta and meta.active is False:
+  if ex.active is False:
     raise HTTPException(status_code=404, detail="Exercicio arquivado")
   if ex.professor_id != current.id:
     raise HTTPException(status_code=403, detail="Exercicio nao pertence a voce")
@@ -114,8 +345,10 @@ def update_exercise(
     setattr(ex, field, value)
   db.add(ex)
   db.commit()
+  library_cache.invalidate(current.id)
+  # O exercício aparece na agenda de vários alunos: descarta o cache de todos.
+  agenda_cache.invalidate()
   db.refresh(ex)
-  ex.active = True
   return ex
 
 
@@ -141,5 +374,7 @@ def delete_exercise(
     meta.active = False
     meta.archived_at = now
   db.add(meta)
+  ex.active = False
   db.commit()
+  library_cache.invalidate(current.id)
   return JSONResponse(status_code=204, content=None)
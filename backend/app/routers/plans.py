@@ -9,15 +9,17 @@ Para evitar perda de histórico e permitir auditoria do que já existiu na ficha
 Assim, a ficha ativa fica limpa (apenas itens ativos aparecem), mas o banco preserva tudo.
 """
 
-from typing import List, Optional
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
-import json
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse
-from sqlalchemy import func, or_
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
+from sqlalchemy import DateTime, Select, and_, case, delete, false, func, insert, literal, select, update
+from sqlalchemy.orm import Session, aliased
 
-from ..database import get_db
+from ..cache import agenda_cache
+from ..database import dialect_insert, get_db
 from ..models import (
     TrainingPlan,
     TrainingPlanMeta,
@@ -29,9 +31,10 @@ from ..models import (
     UserType,
     Student,
     Exercise,
-    ExerciseMeta,
+    ExerciseUsage,
 )
 from ..schemas import (
+    TrainingPlanClone,
     TrainingPlanCreate,
     TrainingPlanOut,
     TrainingSessionCreate,
@@ -39,13 +42,28 @@ from ..schemas import (
     TrainingSessionExerciseCreate,
     TrainingSessionExerciseOut,
     TrainingSessionExerciseUpdate,
+    ExerciseOut,
+    SessionExerciseDetail,
+    SessionExerciseHead,
+    SessionExerciseLineage,
+    SessionExerciseReorder,
+    SessionExerciseVersion,
     SessionWithExercises,
 )
+from ..serialization import json_bytes_response, parse_json
 from ..core.security import get_current_user
 
 
 router = APIRouter()
 
+# Agenda do aluno (rota mais acessada do app): read-model montado sem validação, ver `model_response`.
+_AGENDA_LIST = TypeAdapter(List[SessionWithExercises])
+
+# Limite de ids por consulta em GET /sessao/exercicios/versoes-atuais.
+MAX_HEAD_LOOKUP = 500
+# Limite de alunos por chamada em POST /{plan_id}/clonar.
+MAX_CLONE_STUDENTS = 200
+
 
 
 
@@ -68,6 +86,7 @@ def create_plan(payload: TrainingPlanCreate, db: Session = Depends(get_db), curr
     )
     db.add(plan)
     db.commit()
+    agenda_cache.invalidate(student.id)
     db.refresh(plan)
     return plan
 
@@ -82,46 +101,55 @@ def _ensure_professor_owns_plan(db: Session, plan_id: int, professor_id: int) ->
     return plan
 
 
+def _archive_meta(db: Session, model, meta_model, key: str, ids: Select, now: datetime) -> None:
+    # Arquiva um conjunto inteiro em um único INSERT ... SELECT ... ON CONFLICT DO UPDATE (SQLite e PostgreSQL):
+    # cria a meta dos registros que ainda não têm e desativa as já existentes, sem carregar nada no Python.
+    stmt = dialect_insert(db, meta_model).from_select(
+        [key, "active", "archived_at"],
+        ids.add_columns(false(), literal(now, DateTime)),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={"active": stmt.excluded.active, "archived_at": stmt.excluded.archived_at},
+    )
+    db.execute(stmt)
+    # Mantém o espelho `active` da tabela principal em sincronia (mesmo conjunto, um UPDATE).
+    db.execute(
+        update(model)
+        .where(model.id.in_(ids.scalar_subquery()))
+        .values(active=False)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _archive_sessions(db: Session, session_ids: Select, now: datetime) -> None:
+    # Arquiva as sessões selecionadas e todos os exercícios delas (dois comandos, qualquer tamanho de ficha).
+    _archive_meta(db, TrainingSession, TrainingSessionMeta, "session_id", session_ids, now)
+    item_ids = select(TrainingSessionExercise.id).where(
+        TrainingSessionExercise.session_id.in_(session_ids.scalar_subquery())
+    )
+    _archive_meta(db, TrainingSessionExercise, TrainingSessionExerciseMeta, "session_exercise_id", item_ids, now)
+
+
 def _archive_plan(db: Session, plan_id: int, now: datetime) -> None:
     # Em vez de apagar (o que quebraria historico e referencias), apenas arquivamos.
-    # A ficha ativa e filtrada por *_meta.active == True (ou ausencia de meta = ainda ativo).
-    plan_meta = db.get(TrainingPlanMeta, plan_id)
-    if not plan_meta:
-        plan_meta = TrainingPlanMeta(plan_id=plan_id, active=False, archived_at=now)
-    else:
-        plan_meta.active = False
-        plan_meta.archived_at = now
-    db.add(plan_meta)
+    # A ficha ativa e filtrada pela coluna `active` (espelho de *_meta.active).
+    plan_ids = select(TrainingPlan.id).where(TrainingPlan.id == plan_id)
+    _archive_meta(db, TrainingPlan, TrainingPlanMeta, "plan_id", plan_ids, now)
 
     # Arquiva tambem todas as sessoes e exercicios daquela ficha.
-    sessions = db.query(TrainingSession).filter_by(plan_id=plan_id).all()
-    for sess in sessions:
-        sess_meta = db.get(TrainingSessionMeta, sess.id)
-        if not sess_meta:
-            sess_meta = TrainingSessionMeta(session_id=sess.id, active=False, archived_at=now)
-        else:
-            sess_meta.active = False
-            sess_meta.archived_at = now
-        db.add(sess_meta)
-
-        items = db.query(TrainingSessionExercise).filter_by(session_id=sess.id).all()
-        for item in items:
-            item_meta = db.get(TrainingSessionExerciseMeta, item.id)
-            if not item_meta:
-                item_meta = TrainingSessionExerciseMeta(session_exercise_id=item.id, active=False, archived_at=now)
-            else:
-                item_meta.active = False
-                item_meta.archived_at = now
-            db.add(item_meta)
+    _archive_sessions(db, select(TrainingSession.id).where(TrainingSession.plan_id == plan_id), now)
 
 
 @router.patch("/{plan_id}/desativar", status_code=204)
 def deactivate_plan(plan_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
     if current.type != UserType.PROFESSOR:
         raise HTTPException(status_code=403, detail="Apenas professor pode desativar planos")
-    _ensure_professor_owns_plan(db, plan_id, current.id)
+    plan = _ensure_professor_owns_plan(db, plan_id, current.id)
+    student_id = plan.student_id
     _archive_plan(db, plan_id, datetime.utcnow())
     db.commit()
+    agenda_cache.invalidate(student_id)
     return JSONResponse(status_code=204, content=None)
 
 
@@ -129,25 +157,146 @@ def deactivate_plan(plan_id: int, db: Session = Depends(get_db), current: User =
 def delete_plan(plan_id: int, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
     if current.type != UserType.PROFESSOR:
         raise HTTPException(status_code=403, detail="Apenas professor pode excluir planos")
-    _ensure_professor_owns_plan(db, plan_id, current.id)
+    plan = _ensure_professor_owns_plan(db, plan_id, current.id)
+    student_id = plan.student_id
     _archive_plan(db, plan_id, datetime.utcnow())
     db.commit()
+    agenda_cache.invalidate(student_id)
     return JSONResponse(status_code=204, content=None)
 
 
+def _load_clone_students(db: Session, student_ids: List[int], professor_id: int) -> List[Student]:
+    # Valida todos os alunos em uma consulta; mantém a ordem do pedido.
+    students = {st.id: st for st in db.query(Student).filter(Student.id.in_(student_ids)).all()}
+    missing = [sid for sid in student_ids if sid not in students]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Alunos não encontrados: {missing}")
+    foreign = [sid for sid in student_ids if students[sid].professor_id != professor_id]
+    if foreign:
+        raise HTTPException(status_code=403, detail=f"Alunos não pertencem a este professor: {foreign}")
+    return [students[sid] for sid in student_ids]
+
+
+def _bulk_insert(model):
+    # INSERT em lote pelo ORM. `render_nulls` mantém colunas None no VALUES; sem isso o ORM agrupa as linhas
+    # pelo conjunto de colunas preenchidas e emite um INSERT por grupo.
+    return insert(model).execution_options(render_nulls=True)
+
+
+def _clone_plan(
+    db: Session, source: TrainingPlan, students: List[Student], payload: TrainingPlanClone, professor_id: int
+) -> List[TrainingPlan]:
+    # Copia plano, sessões ativas e itens ativos com INSERTs em lote (RETURNING), sem flush por objeto:
+    # um INSERT para os planos, um por sessão de origem (para todos os alunos) e um para os itens.
+    # As linhas novas são ligadas às de origem por colunas do RETURNING (student_id / plan_id), já que a
+    # ordem do RETURNING não é garantida em todos os bancos.
+    sessions = (
+        db.query(TrainingSession)
+        .filter(TrainingSession.plan_id == source.id)
+        .filter(TrainingSession.active.is_(True))
+        .order_by(TrainingSession.sequence, TrainingSession.id)
+        .all()
+    )
+    items_by_session: Dict[int, List[TrainingSessionExercise]] = {}
+    if sessions:
+        items = (
+            db.query(TrainingSessionExercise)
+            .filter(TrainingSessionExercise.session_id.in_([sess.id for sess in sessions]))
+            .filter(TrainingSessionExercise.active.is_(True))
+            .order_by(TrainingSessionExercise.order, TrainingSessionExercise.id)
+            .all()
+        )
+        for item in items:
+            items_by_session.setdefault(item.session_id, []).append(item)
+
+    start_date = payload.start_date or datetime.utcnow()
+    created = db.scalars(
+        _bulk_insert(TrainingPlan).returning(TrainingPlan),
+        [
+            {
+                "student_id": student.id,
+                "name": payload.name or source.name,
+                "goal": source.goal,
+                "start_date": start_date,
+                "end_date": payload.end_date,
+                "notes": source.notes,
+            }
+            for student in students
+        ],
+    ).all()
+    plans_by_student = {plan.student_id: plan for plan in created}
+    plans = [plans_by_student[student.id] for student in students]
+
+    item_rows = []
+    for sess in sessions:
+        new_sessions = db.execute(
+            _bulk_insert(TrainingSession).returning(TrainingSession.id),
+            [
+                {
+                    "plan_id": plan.id,
+                    "name": sess.name,
+                    "sequence": sess.sequence,
+                    "main_type": sess.main_type,
+                    "notes": sess.notes,
+                }
+                for plan in plans
+            ],
+        ).all()
+        for (new_session_id,) in new_sessions:
+            for item in items_by_session.get(sess.id, []):
+                item_rows.append(
+                    {
+                        "session_id": new_session_id,
+                        "exercise_id": item.exercise_id,
+                        "order": item.order,
+                        "params": item.params,
+                        "notes": item.notes,
+                    }
+                )
+    if item_rows:
+        db.execute(_bulk_insert(TrainingSessionExercise), item_rows)
+        _record_exercise_usage(db, professor_id, [row["exercise_id"] for row in item_rows])
+    return plans
+
+
+@router.post("/{plan_id}/clonar", response_model=List[TrainingPlanOut])
+def clone_plan(
+    plan_id: int,
+    payload: TrainingPlanClone,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    # Usa um plano existente (ativo ou arquivado) como modelo: cada aluno recebe um plano novo e independente.
+    if current.type != UserType.PROFESSOR:
+        raise HTTPException(status_code=403, detail="Apenas professor pode clonar planos")
+    source = _ensure_professor_owns_plan(db, plan_id, current.id)
+    student_ids = list(dict.fromkeys(payload.student_ids))
+    if not student_ids:
+        return []
+    if len(student_ids) > MAX_CLONE_STUDENTS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_CLONE_STUDENTS} alunos por chamada")
+    students = _load_clone_students(db, student_ids, current.id)
+    plans = _clone_plan(db, source, students, payload, current.id)
+    # Monta a resposta antes do commit (que expira os objetos e forçaria um SELECT por plano).
+    result = [TrainingPlanOut.model_validate(plan) for plan in plans]
+    db.commit()
+    for student_id in student_ids:
+        agenda_cache.invalidate(student_id)
+    return result
+
+
 def _list_student_plans(db: Session, student_id: int, include_inactive: bool = False) -> List[TrainingPlan]:
     query = (
-        db.query(TrainingPlan, TrainingPlanMeta.active, TrainingPlanMeta.archived_at)
+        db.query(TrainingPlan, TrainingPlanMeta.archived_at)
         .outerjoin(TrainingPlanMeta, TrainingPlanMeta.plan_id == TrainingPlan.id)
         .filter(TrainingPlan.student_id == student_id)
     )
     if not include_inactive:
         # Por padrao mantemos apenas os planos ativos da ficha atual.
-        query = query.filter(or_(TrainingPlanMeta.active.is_(None), TrainingPlanMeta.active.is_(True)))
+        query = query.filter(TrainingPlan.active.is_(True))
     rows = query.order_by(TrainingPlan.id.desc()).all()
     plans: List[TrainingPlan] = []
-    for plan, active_flag, archived_at in rows:
-        plan.active = True if active_flag is None else bool(active_flag)
+    for plan, archived_at in rows:
         plan.archived_at = archived_at
         plans.append(plan)
     return plans
@@ -192,8 +341,7 @@ def create_session(payload: TrainingSessionCreate, db: Session = Depends(get_db)
     if not plan:
         raise HTTPException(status_code=404, detail="Plano não encontrado")
     # Não permite adicionar sessão em plano já arquivado.
-    plan_meta = db.get(TrainingPlanMeta, plan.id)
-    if plan_meta and plan_meta.active is False:
+    if plan.active is False:
         raise HTTPException(status_code=404, detail="Plano arquivado")
     student = db.get(Student, plan.student_id)
     if not student or student.professor_id != current.id:
@@ -215,6 +363,7 @@ def create_session(payload: TrainingSessionCreate, db: Session = Depends(get_db)
     )
     db.add(session)
     db.commit()
+    agenda_cache.invalidate(student.id)
     db.refresh(session)
     return session
 
@@ -238,9 +387,8 @@ def list_sessions(plan_id: int, db: Session = Depends(get_db), current: User = D
     # Lista somente sessões ativas do plano.
     return (
         db.query(TrainingSession)
-        .outerjoin(TrainingSessionMeta, TrainingSessionMeta.session_id == TrainingSession.id)
         .filter(TrainingSession.plan_id == plan_id)
-        .filter(or_(TrainingSessionMeta.active.is_(None), TrainingSessionMeta.active.is_(True)))
+        .filter(TrainingSession.active.is_(True))
         .order_by(TrainingSession.sequence, TrainingSession.id)
         .all()
     )
@@ -252,8 +400,7 @@ def _ensure_professor_owns_session(db: Session, session_id: int, professor_id: i
     if not session:
         raise HTTPException(status_code=404, detail="Sessão não encontrada")
     # Sessões arquivadas não devem ser manipuladas pela ficha ativa.
-    meta = db.get(TrainingSessionMeta, session_id)
-    if meta and meta.active is False:
+    if session.active is False:
         raise HTTPException(status_code=404, detail="Sessão arquivada")
     plan = db.get(TrainingPlan, session.plan_id)
     student = db.get(Student, plan.student_id) if plan else None
@@ -262,26 +409,53 @@ def _ensure_professor_owns_session(db: Session, session_id: int, professor_id: i
     return session
 
 
-def _parse_params(value):
-    if value is None:
-        return None
-    if isinstance(value, str):
-        try:
-            return json.loads(value)
-        except Exception:
-            return None
-    return value
+def _record_exercise_usage(db: Session, professor_id: int, exercise_ids: Iterable[int]) -> None:
+    # Soma os usos dos exercícios recém-prescritos (um upsert para todos; ver GET /exercicios/sugestoes).
+    counts = Counter(exercise_ids)
+    if not counts:
+        return
+    stmt = dialect_insert(db, ExerciseUsage).values(
+        [
+            {"professor_id": professor_id, "exercise_id": exercise_id, "uses": uses}
+            for exercise_id, uses in counts.items()
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["professor_id", "exercise_id"],
+        set_={"uses": ExerciseUsage.uses + stmt.excluded.uses},
+    )
+    db.execute(stmt)
+
+
+def _rebuild_exercise_usage(db: Session, professor_id: Optional[int] = None) -> int:
+    # Recalcula os contadores a partir das fichas: conta os itens de sessão de cada professor, exceto os
+    # criados como nova versão de outro item (edições), do mesmo jeito que `_record_exercise_usage`.
+    previous = aliased(TrainingSessionExerciseMeta)
+    counts = (
+        select(Student.professor_id, TrainingSessionExercise.exercise_id, func.count())
+        .select_from(TrainingSessionExercise)
+        .join(TrainingSession, TrainingSession.id == TrainingSessionExercise.session_id)
+        .join(TrainingPlan, TrainingPlan.id == TrainingSession.plan_id)
+        .join(Student, Student.id == TrainingPlan.student_id)
+        .outerjoin(previous, previous.replaced_by_id == TrainingSessionExercise.id)
+        .where(previous.session_exercise_id.is_(None))
+        .group_by(Student.professor_id, TrainingSessionExercise.exercise_id)
+    )
+    clear = delete(ExerciseUsage)
+    if professor_id is not None:
+        counts = counts.where(Student.professor_id == professor_id)
+        clear = clear.where(ExerciseUsage.professor_id == professor_id)
+    db.execute(clear)
+    result = db.execute(insert(ExerciseUsage).from_select(["professor_id", "exercise_id", "uses"], counts))
+    return result.rowcount
+
 
 def _next_exercise_order(db: Session, session_id: int) -> int:
     # Próxima posição na ordem (considerando apenas itens ativos).
     max_order = (
         db.query(func.max(TrainingSessionExercise.order))
-        .outerjoin(
-            TrainingSessionExerciseMeta,
-            TrainingSessionExerciseMeta.session_exercise_id == TrainingSessionExercise.id,
-        )
         .filter(TrainingSessionExercise.session_id == session_id)
-        .filter(or_(TrainingSessionExerciseMeta.active.is_(None), TrainingSessionExerciseMeta.active.is_(True)))
+        .filter(TrainingSessionExercise.active.is_(True))
         .scalar()
     )
     return (max_order or 0) + 1
@@ -295,17 +469,13 @@ def list_session_exercises(session_id: int, db: Session = Depends(get_db), curre
     # Lista somente exercícios ativos da sessão.
     items = (
         db.query(TrainingSessionExercise)
-        .outerjoin(
-            TrainingSessionExerciseMeta,
-            TrainingSessionExerciseMeta.session_exercise_id == TrainingSessionExercise.id,
-        )
         .filter(TrainingSessionExercise.session_id == session_id)
-        .filter(or_(TrainingSessionExerciseMeta.active.is_(None), TrainingSessionExerciseMeta.active.is_(True)))
+        .filter(TrainingSessionExercise.active.is_(True))
         .order_by(TrainingSessionExercise.order, TrainingSessionExercise.id)
         .all()
     )
     for item in items:
-        item.params = _parse_params(item.params)
+        item.params = parse_json(item.params)
     return items
 
 
@@ -324,8 +494,7 @@ def add_session_exercise(
     if not exercise or (exercise.professor_id not in (None, current.id)):
         raise HTTPException(status_code=404, detail="Exercício não encontrado ou não pertence a você")
 
-    meta = db.get(ExerciseMeta, exercise.id)
-    if meta and meta.active is False:
+    if exercise.active is False:
         raise HTTPException(status_code=404, detail="Exercicio arquivado")
     next_order = payload.order if payload.order and payload.order > 0 else _next_exercise_order(db, session.id)
     sess_ex = TrainingSessionExercise(
@@ -336,9 +505,12 @@ def add_session_exercise(
         notes=payload.notes,
     )
     db.add(sess_ex)
+    _record_exercise_usage(db, current.id, [payload.exercise_id])
+    student_id = _session_student_id(db, session)
     db.commit()
+    agenda_cache.invalidate(student_id)
     db.refresh(sess_ex)
-    sess_ex.params = _parse_params(sess_ex.params)
+    sess_ex.params = parse_json(sess_ex.params)
     return sess_ex
 
 
@@ -350,43 +522,126 @@ def add_session_exercises_bulk(
     current: User = Depends(get_current_user),
 ):
     if current.type != UserType.PROFESSOR:
-        raise HTTPException(status_code=403, detail="Apenas professor pode adicionar exercÇðcios Çÿ sessÇœo")
+        raise HTTPException(status_code=403, detail="Apenas professor pode adicionar exercícios à sessão")
     session = _ensure_professor_owns_session(db, session_id, current.id)
     if not payload:
         return []
 
-    next_order = _next_exercise_order(db, session.id)
-    created: List[TrainingSessionExercise] = []
-
+    # Valida todos os exercícios em uma consulta (em vez de um db.get por item).
+    exercise_ids = {item.exercise_id for item in payload}
+    exercises = {
+        ex_id: active
+        for ex_id, active in db.execute(
+            select(Exercise.id, Exercise.active)
+            .where(Exercise.id.in_(exercise_ids))
+            .where(Exercise.professor_id.is_(None) | (Exercise.professor_id == current.id))
+        )
+    }
     for item in payload:
-        exercise = db.get(Exercise, item.exercise_id)
-        if not exercise or (exercise.professor_id not in (None, current.id)):
+        if item.exercise_id not in exercises:
             raise HTTPException(
                 status_code=404,
-                detail=f"ExercÇðcio {item.exercise_id} nÇœo encontrado ou nÇœo pertence a vocÇ¦",
+                detail=f"Exercício {item.exercise_id} não encontrado ou não pertence a você",
             )
-
-        meta = db.get(ExerciseMeta, exercise.id)
-        if meta and meta.active is False:
+        if exercises[item.exercise_id] is False:
             raise HTTPException(status_code=404, detail="Exercicio arquivado")
+
+    next_order = _next_exercise_order(db, session.id)
+    rows = []
+    for item in payload:
         order_value = item.order if item.order and item.order > 0 else next_order
         next_order = max(next_order, order_value + 1)
-
-        sess_ex = TrainingSessionExercise(
-            session_id=session.id,
-            exercise_id=item.exercise_id,
-            order=order_value,
-            params=item.params,
-            notes=item.notes,
+        rows.append(
+            {
+                "session_id": session.id,
+                "exercise_id": item.exercise_id,
+                "order": order_value,
+                "params": item.params,
+                "notes": item.notes,
+            }
         )
-        db.add(sess_ex)
-        created.append(sess_ex)
 
+    # INSERT em lote com RETURNING: a resposta sai das linhas retornadas, sem refresh por item.
+    created = db.execute(
+        _bulk_insert(TrainingSessionExercise).returning(
+            TrainingSessionExercise.id,
+            TrainingSessionExercise.session_id,
+            TrainingSessionExercise.exercise_id,
+            TrainingSessionExercise.order,
+            TrainingSessionExercise.params,
+            TrainingSessionExercise.notes,
+        ),
+        rows,
+    ).all()
+    # A ordem do RETURNING não é garantida em todos os bancos: devolve os itens na ordem de criação (id).
+    result = [
+        TrainingSessionExerciseOut(
+            id=row.id,
+            session_id=row.session_id,
+            exercise_id=row.exercise_id,
+            order=row.order,
+            params=parse_json(row.params),
+            notes=row.notes,
+        )
+        for row in sorted(created, key=lambda r: r.id)
+    ]
+    _record_exercise_usage(db, current.id, [item.exercise_id for item in payload])
+    student_id = _session_student_id(db, session)
     db.commit()
-    for obj in created:
-        db.refresh(obj)
-        obj.params = _parse_params(obj.params)
-    return created
+    agenda_cache.invalidate(student_id)
+    return result
+
+
+@router.put("/sessao/{session_id}/exercicios/ordem", response_model=List[TrainingSessionExerciseOut])
+def reorder_session_exercises(
+    session_id: int,
+    payload: SessionExerciseReorder,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    # Reordenar não cria versões: a posição não faz parte da prescrição, e as execuções já guardam
+    # a ordem vigente no snapshot. Todas as posições são gravadas em um único UPDATE.
+    if current.type != UserType.PROFESSOR:
+        raise HTTPException(status_code=403, detail="Apenas professor pode reordenar exercícios da sessão")
+    session = _ensure_professor_owns_session(db, session_id, current.id)
+
+    items = {
+        item.id: item
+        for item in db.query(TrainingSessionExercise)
+        .filter(TrainingSessionExercise.session_id == session.id)
+        .filter(TrainingSessionExercise.active.is_(True))
+        .all()
+    }
+    if len(set(payload.item_ids)) != len(payload.item_ids) or set(payload.item_ids) != set(items):
+        raise HTTPException(
+            status_code=400,
+            detail="A nova ordem deve conter cada exercício ativo da sessão exatamente uma vez",
+        )
+    positions = {item_id: position for position, item_id in enumerate(payload.item_ids, start=1)}
+    changed = [item_id for item_id, position in positions.items() if items[item_id].order != position]
+    if changed:
+        db.execute(
+            update(TrainingSessionExercise)
+            .where(TrainingSessionExercise.id.in_(changed))
+            .values(order=case(positions, value=TrainingSessionExercise.id))
+            .execution_options(synchronize_session=False)
+        )
+    result = [
+        TrainingSessionExerciseOut(
+            id=item_id,
+            session_id=session.id,
+            exercise_id=items[item_id].exercise_id,
+            order=positions[item_id],
+            params=parse_json(items[item_id].params),
+            notes=items[item_id].notes,
+        )
+        for item_id in payload.item_ids
+    ]
+    if changed:
+        student_id = _session_student_id(db, session)
+        db.commit()
+        agenda_cache.invalidate(student_id)
+    return result
 
 
 @router.patch("/sessao/exercicios/{item_id}", response_model=TrainingSessionExerciseOut)
@@ -404,9 +659,8 @@ def update_session_exercise(
     if current.type != UserType.PROFESSOR:
         raise HTTPException(status_code=403, detail="Apenas professor pode editar exercício da sessão")
 
-    _ensure_professor_owns_session(db, sess_ex.session_id, current.id)
-    existing_meta = db.get(TrainingSessionExerciseMeta, sess_ex.id)
-    if existing_meta and existing_meta.active is False:
+    session = _ensure_professor_owns_session(db, sess_ex.session_id, current.id)
+    if sess_ex.active is False:
         raise HTTPException(status_code=404, detail="Exercício de sessão arquivado")
 
     # Versionamento: cria um novo item com os novos dados e arquiva o anterior.
@@ -422,15 +676,20 @@ def update_session_exercise(
     db.flush()
 
     now = datetime.utcnow()
-    meta = existing_meta or TrainingSessionExerciseMeta(session_exercise_id=sess_ex.id)
+    meta = db.get(TrainingSessionExerciseMeta, sess_ex.id)
+    if not meta:
+        meta = TrainingSessionExerciseMeta(session_exercise_id=sess_ex.id)
     meta.active = False
     meta.archived_at = now
     meta.replaced_by_id = new_item.id
     db.add(meta)
+    sess_ex.active = False
 
+    student_id = _session_student_id(db, session)
     db.commit()
+    agenda_cache.invalidate(student_id)
     db.refresh(new_item)
-    new_item.params = _parse_params(new_item.params)
+    new_item.params = parse_json(new_item.params)
     return new_item
 
 
@@ -447,7 +706,7 @@ def delete_session_exercise(
     # Excluir item = arquivar (soft delete). Mantém histórico/execuções intactas.
     if current.type != UserType.PROFESSOR:
         raise HTTPException(status_code=403, detail="Apenas professor pode excluir exercício da sessão")
-    _ensure_professor_owns_session(db, sess_ex.session_id, current.id)
+    session = _ensure_professor_owns_session(db, sess_ex.session_id, current.id)
 
     now = datetime.utcnow()
     meta = db.get(TrainingSessionExerciseMeta, sess_ex.id)
@@ -457,10 +716,161 @@ def delete_session_exercise(
         meta.active = False
         meta.archived_at = now
     db.add(meta)
+    sess_ex.active = False
+    student_id = _session_student_id(db, session)
     db.commit()
+    agenda_cache.invalidate(student_id)
     return JSONResponse(status_code=204, content=None)
 
 
+# Linhagem de versões
+# Cada edição cria um item novo com id maior e aponta o antigo para ele via `replaced_by_id`, então a
+# linhagem é uma cadeia em ordem crescente de id. As CTEs exigem id crescente (para frente) e decrescente
+# (para trás) em cada passo, o que garante término mesmo com dados inconsistentes.
+def _lineage_forward(seed: Select, name: str):
+    # Colunas (origin_id, item_id): cada item semente e todas as versões posteriores a ele.
+    chain = seed.cte(name, recursive=True)
+    meta = aliased(TrainingSessionExerciseMeta)
+    return chain.union_all(
+        select(chain.c.origin_id, meta.replaced_by_id)
+        .join(meta, meta.session_exercise_id == chain.c.item_id)
+        .where(meta.replaced_by_id > chain.c.item_id)
+    )
+
+
+def _lineage_backward(seed: Select, name: str):
+    # Colunas (origin_id, item_id): cada item semente e todas as versões anteriores (usa o índice em replaced_by_id).
+    chain = seed.cte(name, recursive=True)
+    meta = aliased(TrainingSessionExerciseMeta)
+    return chain.union_all(
+        select(chain.c.origin_id, meta.session_exercise_id)
+        .join(meta, meta.replaced_by_id == chain.c.item_id)
+        .where(meta.session_exercise_id < chain.c.item_id)
+    )
+
+
+def _lineage_seed(item_ids) -> Select:
+    return select(
+        TrainingSessionExercise.id.label("origin_id"), TrainingSessionExercise.id.label("item_id")
+    ).where(TrainingSessionExercise.id.in_(item_ids))
+
+
+def _load_lineage(db: Session, item_id: int) -> List[SessionExerciseVersion]:
+    # Todas as versões do item (anteriores, ele mesmo e posteriores) em uma única consulta.
+    seed = _lineage_seed([item_id])
+    later = _lineage_forward(seed, "lineage_later")
+    earlier = _lineage_backward(seed, "lineage_earlier")
+    versions = select(later.c.item_id).union(select(earlier.c.item_id)).subquery()
+    rows = db.execute(
+        select(
+            TrainingSessionExercise.id,
+            TrainingSessionExercise.session_id,
+            TrainingSessionExercise.exercise_id,
+            TrainingSessionExercise.order,
+            TrainingSessionExercise.params,
+            TrainingSessionExercise.notes,
+            TrainingSessionExercise.active,
+            TrainingSessionExerciseMeta.archived_at,
+            TrainingSessionExerciseMeta.replaced_by_id,
+        )
+        .join(versions, versions.c.item_id == TrainingSessionExercise.id)
+        .outerjoin(
+            TrainingSessionExerciseMeta,
+            TrainingSessionExerciseMeta.session_exercise_id == TrainingSessionExercise.id,
+        )
+        .order_by(TrainingSessionExercise.id)
+    ).all()
+    return [
+        SessionExerciseVersion(
+            id=row.id,
+            session_id=row.session_id,
+            exercise_id=row.exercise_id,
+            order=row.order,
+            params=parse_json(row.params),
+            notes=row.notes,
+            active=row.active,
+            archived_at=row.archived_at,
+            replaced_by_id=row.replaced_by_id,
+        )
+        for row in rows
+    ]
+
+
+def _load_version_heads(db: Session, item_ids: List[int], current: User) -> Dict[int, SessionExerciseHead]:
+    # Versão atual de cada item em uma única consulta, restrita a itens que o usuário pode ver.
+    chain = _lineage_forward(_lineage_seed(item_ids), "lineage_heads")
+    successor = aliased(TrainingSessionExerciseMeta)
+    head = aliased(TrainingSessionExercise)
+    query = (
+        select(chain.c.origin_id, chain.c.item_id, head.active)
+        .join(head, head.id == chain.c.item_id)
+        .join(TrainingSession, TrainingSession.id == head.session_id)
+        .join(TrainingPlan, TrainingPlan.id == TrainingSession.plan_id)
+        .join(Student, Student.id == TrainingPlan.student_id)
+        .outerjoin(
+            successor,
+            and_(successor.session_exercise_id == chain.c.item_id, successor.replaced_by_id > chain.c.item_id),
+        )
+        .where(successor.session_exercise_id.is_(None))
+    )
+    if current.type == UserType.PROFESSOR:
+        query = query.where(Student.professor_id == current.id)
+    else:
+        query = query.where(Student.user_id == current.id)
+    return {
+        row.origin_id: SessionExerciseHead(item_id=row.origin_id, head_id=row.item_id, active=row.active)
+        for row in db.execute(query)
+    }
+
+
+def _ensure_can_view_session_item(db: Session, item: TrainingSessionExercise, current: User) -> None:
+    # Leitura de histórico: vale também para itens/sessões arquivados.
+    session = db.get(TrainingSession, item.session_id)
+    plan = db.get(TrainingPlan, session.plan_id) if session else None
+    student = db.get(Student, plan.student_id) if plan else None
+    if not student:
+        raise HTTPException(status_code=404, detail="Aluno não encontrado")
+    if current.type == UserType.PROFESSOR:
+        if student.professor_id != current.id:
+            raise HTTPException(status_code=403, detail="Sessão não pertence a este professor")
+    elif current.type == UserType.ALUNO:
+        if student.user_id != current.id:
+            raise HTTPException(status_code=403, detail="Acesso negado a sessões de outro aluno")
+    else:
+        raise HTTPException(status_code=403, detail="Perfil não autorizado")
+
+
+@router.get("/sessao/exercicios/versoes-atuais", response_model=List[SessionExerciseHead])
+def get_session_exercise_heads(
+    ids: List[int] = Query(...),
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    # Mapeia itens históricos (ex.: de execuções antigas) para a versão atual da prescrição.
+    # Ids inexistentes ou de outros alunos/professores são omitidos da resposta.
+    if current.type not in (UserType.PROFESSOR, UserType.ALUNO):
+        raise HTTPException(status_code=403, detail="Perfil não autorizado")
+    unique_ids = list(dict.fromkeys(ids))
+    if len(unique_ids) > MAX_HEAD_LOOKUP:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_HEAD_LOOKUP} itens por consulta")
+    heads = _load_version_heads(db, unique_ids, current)
+    return [heads[item_id] for item_id in unique_ids if item_id in heads]
+
+
+@router.get("/sessao/exercicios/{item_id}/versoes", response_model=SessionExerciseLineage)
+def get_session_exercise_lineage(
+    item_id: int,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    sess_ex = db.get(TrainingSessionExercise, item_id)
+    if not sess_ex:
+        raise HTTPException(status_code=404, detail="Exercício de sessão não encontrado")
+    _ensure_can_view_session_item(db, sess_ex, current)
+    versions = _load_lineage(db, item_id)
+    return SessionExerciseLineage(item_id=item_id, head_id=versions[-1].id, versions=versions)
+
+
 @router.delete("/sessao/{session_id}", status_code=204)
 def delete_session(
     session_id: int,
@@ -478,25 +888,9 @@ def delete_session(
         raise HTTPException(status_code=403, detail="Sessão não pertence a este professor")
 
     # Excluir sessão = arquivar (soft delete). Mantém execuções e referências.
-    now = datetime.utcnow()
-    sess_meta = db.get(TrainingSessionMeta, session_id)
-    if not sess_meta:
-        sess_meta = TrainingSessionMeta(session_id=session_id, active=False, archived_at=now)
-    else:
-        sess_meta.active = False
-        sess_meta.archived_at = now
-    db.add(sess_meta)
-
-    items = db.query(TrainingSessionExercise).filter_by(session_id=session_id).all()
-    for item in items:
-        item_meta = db.get(TrainingSessionExerciseMeta, item.id)
-        if not item_meta:
-            item_meta = TrainingSessionExerciseMeta(session_exercise_id=item.id, active=False, archived_at=now)
-        else:
-            item_meta.active = False
-            item_meta.archived_at = now
-        db.add(item_meta)
+    _archive_sessions(db, select(TrainingSession.id).where(TrainingSession.id == session_id), datetime.utcnow())
     db.commit()
+    agenda_cache.invalidate(student.id)
     return JSONResponse(status_code=204, content=None)
 
 
@@ -515,12 +909,8 @@ def copy_session_exercises(
     # Copia apenas itens ativos da sessão de origem.
     source_items = (
         db.query(TrainingSessionExercise)
-        .outerjoin(
-            TrainingSessionExerciseMeta,
-            TrainingSessionExerciseMeta.session_exercise_id == TrainingSessionExercise.id,
-        )
         .filter(TrainingSessionExercise.session_id == source_session_id)
-        .filter(or_(TrainingSessionExerciseMeta.active.is_(None), TrainingSessionExerciseMeta.active.is_(True)))
+        .filter(TrainingSessionExercise.active.is_(True))
         .order_by(TrainingSessionExercise.order, TrainingSessionExercise.id)
         .all()
     )
@@ -535,13 +925,94 @@ def copy_session_exercises(
         )
         db.add(cloned_item)
         cloned.append(cloned_item)
+    _record_exercise_usage(db, current.id, [item.exercise_id for item in source_items])
+    student_id = _session_student_id(db, target_session)
     db.commit()
+    agenda_cache.invalidate(student_id)
     for item in cloned:
         db.refresh(item)
-        item.params = _parse_params(item.params)
+        item.params = parse_json(item.params)
     return cloned
 
 
+def _session_student_id(db: Session, session: TrainingSession) -> int:
+    # Aluno dono da sessão (o plano já está no identity map após as checagens de acesso).
+    return db.get(TrainingPlan, session.plan_id).student_id
+
+
+def _load_student_agenda(
+    db: Session, student_id: int, session_number: Optional[int], plan_id: Optional[int]
+) -> List[SessionWithExercises]:
+    # Agenda em uma única consulta: sessões ativas dos planos ativos, cada uma com seus itens ativos
+    # e o exercício de cada item (LEFT JOIN: sessões sem itens ativos também aparecem).
+    q = (
+        db.query(TrainingSession, TrainingSessionExercise, Exercise)
+        .join(TrainingPlan, TrainingPlan.id == TrainingSession.plan_id)
+        .outerjoin(
+            TrainingSessionExercise,
+            and_(
+                TrainingSessionExercise.session_id == TrainingSession.id,
+                TrainingSessionExercise.active.is_(True),
+            ),
+        )
+        .outerjoin(Exercise, Exercise.id == TrainingSessionExercise.exercise_id)
+        .filter(TrainingPlan.student_id == student_id)
+        # Aluno só enxerga planos/sessões ativos na agenda.
+        .filter(TrainingPlan.active.is_(True))
+        .filter(TrainingSession.active.is_(True))
+    )
+    if plan_id:
+        q = q.filter(TrainingPlan.id == plan_id)
+    if session_number is not None:
+        q = q.filter(TrainingSession.sequence == session_number)
+    rows = q.order_by(
+        TrainingSession.sequence,
+        TrainingSession.id,
+        TrainingSessionExercise.order,
+        TrainingSessionExercise.id,
+    ).all()
+
+    result: List[SessionWithExercises] = []
+    by_session: Dict[int, SessionWithExercises] = {}
+    for sess, ex, ex_obj in rows:
+        payload = by_session.get(sess.id)
+        if payload is None:
+            payload = SessionWithExercises.model_construct(
+                id=sess.id,
+                plan_id=sess.plan_id,
+                student_id=student_id,
+                name=sess.name,
+                sequence=sess.sequence,
+                main_type=sess.main_type,
+                notes=sess.notes,
+                exercises=[],
+            )
+            by_session[sess.id] = payload
+            result.append(payload)
+        if ex is None or ex_obj is None:
+            continue
+        exercise_payload = ExerciseOut.model_construct(
+            id=ex_obj.id,
+            name=ex_obj.name,
+            type=ex_obj.type,
+            group=ex_obj.group,
+            description=ex_obj.description,
+            tips=ex_obj.tips,
+            video_url=ex_obj.video_url,
+            endurance_params=parse_json(ex_obj.endurance_params),
+        )
+        payload.exercises.append(
+            SessionExerciseDetail.model_construct(
+                id=ex.id,
+                order=ex.order,
+                params=parse_json(ex.params),
+                notes=ex.notes,
+                exercise=exercise_payload,
+            )
+        )
+    return result
+
+
 @router.get("/aluno/agenda", response_model=List[SessionWithExercises])
 def student_agenda(
     session_number: Optional[int] = None,
@@ -552,82 +1023,28 @@ def student_agenda(
     if current.type != UserType.ALUNO:
         raise HTTPException(status_code=403, detail="Apenas aluno pode ver a própria agenda")
 
-    student = db.query(Student).filter_by(user_id=current.id).first()
-    if not student:
+    # user_id -> student_id (vínculo fixo) fica no próprio cache, para a agenda em cache não precisar
+    # consultar o aluno.
+    def load_student_id() -> Optional[int]:
+        student = db.query(Student).filter_by(user_id=current.id).first()
+        return student.id if student else None
+
+    student_id = agenda_cache.owner_for(current.id, load_student_id)
+    if student_id is None:
         return []
 
-    # Aluno só enxerga planos/sessões ativos na agenda.
-    plans_q = (
-        db.query(TrainingPlan)
-        .outerjoin(TrainingPlanMeta, TrainingPlanMeta.plan_id == TrainingPlan.id)
-        .filter(TrainingPlan.student_id == student.id)
-        .filter(or_(TrainingPlanMeta.active.is_(None), TrainingPlanMeta.active.is_(True)))
-    )
+    plan_int: Optional[int] = None
     if plan_id:
         try:
             plan_int = int(plan_id)
         except ValueError:
             plan_int = None
-        if plan_int:
-            plans_q = plans_q.filter(TrainingPlan.id == plan_int)
-    plan_ids = [p.id for p in plans_q.all()]
-    if not plan_ids:
-        return []
 
-    sessions_q = (
-        db.query(TrainingSession)
-        .outerjoin(TrainingSessionMeta, TrainingSessionMeta.session_id == TrainingSession.id)
-        .filter(TrainingSession.plan_id.in_(plan_ids))
-        .filter(or_(TrainingSessionMeta.active.is_(None), TrainingSessionMeta.active.is_(True)))
-    )
-    if session_number is not None:
-        sessions_q = sessions_q.filter(TrainingSession.sequence == session_number)
-    sessions = sessions_q.order_by(TrainingSession.sequence, TrainingSession.id).all()
-
-    result: List[SessionWithExercises] = []
-    for sess in sessions:
-        # Exercícios ativos da sessão.
-        exercises = (
-            db.query(TrainingSessionExercise)
-            .outerjoin(
-                TrainingSessionExerciseMeta,
-                TrainingSessionExerciseMeta.session_exercise_id == TrainingSessionExercise.id,
-            )
-            .filter(TrainingSessionExercise.session_id == sess.id)
-            .filter(or_(TrainingSessionExerciseMeta.active.is_(None), TrainingSessionExerciseMeta.active.is_(True)))
-            .order_by(TrainingSessionExercise.order, TrainingSessionExercise.id)
-            .all()
-        )
-        payload = SessionWithExercises(
-            id=sess.id,
-            plan_id=sess.plan_id,
-            student_id=student.id,
-            name=sess.name,
-            sequence=sess.sequence,
-            main_type=sess.main_type,
-            notes=sess.notes,
-            exercises=[],
-        )
-        for ex in exercises:
-            ex_obj = ex.exercise
-            exercise_payload = {
-                "id": ex_obj.id,
-                "name": ex_obj.name,
-                "type": ex_obj.type,
-                "group": ex_obj.group,
-                "description": ex_obj.description,
-                "tips": ex_obj.tips,
-                "video_url": ex_obj.video_url,
-                "endurance_params": _parse_params(ex_obj.endurance_params),
-            }
-            payload.exercises.append(
-                {
-                    "id": ex.id,
-                    "order": ex.order,
-                    "params": _parse_params(ex.params),
-                    "notes": ex.notes,
-                    "exercise": exercise_payload,
-                }
-            )
-        result.append(payload)
-    return result
+    # Reaberturas da agenda não vão ao banco: o cache do aluno é descartado sempre que o professor
+    # altera planos, sessões ou itens dele (ver `agenda_cache.invalidate`).
+    key = (session_number, plan_int)
+    body, token = agenda_cache.get(student_id, key)
+    if body is None:
+        body = _AGENDA_LIST.dump_json(_load_student_agenda(db, student_id, session_number, plan_int))
+        agenda_cache.set(student_id, key, body, token)
+    return json_bytes_response(body)
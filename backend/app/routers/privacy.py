@@ -19,7 +19,8 @@ from ..models import (
 )
 from ..schemas import AccountUpdate, ConsentStatus, ConsentUpdate, UserOut
 from ..core.security import get_current_user, get_password_hash
-from .executions import _execution_to_payload, _parse_params
+from ..serialization import JSONResponse, parse_json
+from .executions import _build_execution_reports
 
 router = APIRouter()
 
@@ -155,7 +156,7 @@ def update_account(
     return current
 
 
-@router.get("/export")
+@router.get("/export", response_class=JSONResponse)
 def export_my_data(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
     consent = _get_consent(db, current.id)
     payload: Dict[str, Any] = {
@@ -235,7 +236,7 @@ def export_my_data(db: Session = Depends(get_db), current: User = Depends(get_cu
                     "session_id": sess_ex.session_id,
                     "exercise_id": sess_ex.exercise_id,
                     "order": sess_ex.order,
-                    "params": _parse_params(sess_ex.params),
+                    "params": parse_json(sess_ex.params),
                     "notes": sess_ex.notes,
                     "exercise": {
                         "name": ex.name if ex else None,
@@ -245,7 +246,7 @@ def export_my_data(db: Session = Depends(get_db), current: User = Depends(get_cu
                 }
                 for sess_ex, ex in session_ex_rows
             ],
-            "executions": [_execution_to_payload(db, e).model_dump() for e in executions],
+            "executions": [r.model_dump() for r in _build_execution_reports(db, executions)],
         }
     )
     return payload
@@ -9,12 +9,24 @@ Observações importantes:
 Por isso, `TrainingExecutionCreate` aceita `exercises` com `performed` (ex.: set_details com reps/carga).
 """
 
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, EmailStr, Field
+from datetime import datetime, timezone
+from typing import Annotated, Optional, List, Dict, Any
+from pydantic import AfterValidator, BaseModel, EmailStr, Field
 
 from .models import UserType, ExerciseType, ExecutionStatus
 
+
+def _naive_utc(value: datetime) -> datetime:
+    # O banco guarda horários UTC sem fuso (datetime.utcnow): "Z"/"-03:00" são convertidos para UTC.
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# Data/hora recebida do cliente (corpo ou query string), já em UTC sem fuso para comparar com as colunas.
+NaiveUTCDateTime = Annotated[datetime, AfterValidator(_naive_utc)]
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -83,6 +95,20 @@ class ExerciseOut(ExerciseBase):
     class Config:
         from_attributes = True
 
+class ExerciseSuggestion(ExerciseOut):
+    # Exercício da biblioteca com o número de vezes que o professor já o prescreveu.
+    uses: int
+
+class ExerciseImportIssue(BaseModel):
+    # Linha do arquivo importado que não virou exercício, e o motivo.
+    line: int
+    detail: str
+
+class ExerciseImportResult(BaseModel):
+    created: int
+    duplicates: List[ExerciseImportIssue]
+    errors: List[ExerciseImportIssue]
+
 class TrainingPlanBase(BaseModel):
     name: str
     goal: Optional[str] = None
@@ -100,6 +126,13 @@ class TrainingPlanOut(TrainingPlanBase):
     class Config:
         from_attributes = True
 
+class TrainingPlanClone(BaseModel):
+    # Aplica o plano (sessões e exercícios ativos) como modelo para cada aluno da lista.
+    student_ids: List[int]
+    name: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
 class TrainingSessionBase(BaseModel):
     name: str
     sequence: Optional[int] = None
@@ -134,6 +167,31 @@ class TrainingSessionExerciseOut(TrainingSessionExerciseBase):
         from_attributes = True
 
 
+class SessionExerciseVersion(TrainingSessionExerciseOut):
+    # Uma versão de um item da sessão; `replaced_by_id` aponta para a versão seguinte.
+    active: bool
+    archived_at: Optional[datetime] = None
+    replaced_by_id: Optional[int] = None
+
+
+class SessionExerciseLineage(BaseModel):
+    item_id: int
+    head_id: int
+    versions: List[SessionExerciseVersion]
+
+
+class SessionExerciseHead(BaseModel):
+    # Versão atual (última da linhagem) de um item possivelmente histórico.
+    item_id: int
+    head_id: int
+    active: bool
+
+
+class SessionExerciseReorder(BaseModel):
+    # Ordem completa dos itens ativos da sessão (posição 1 = primeiro id da lista).
+    item_ids: List[int]
+
+
 class TrainingSessionExerciseUpdate(BaseModel):
     order: Optional[int] = None
     params: Optional[Dict[str, Any]] = None
@@ -159,6 +217,17 @@ class TrainingExecutionCreate(TrainingExecutionBase):
     # Se vier vazio/nulo, a API ainda cria o snapshot, mas não terá cargas/reps para evolução.
     exercises: Optional[List[ExerciseExecutionIn]] = None
 
+class TrainingExecutionSyncItem(TrainingExecutionCreate):
+    # Treino registrado offline no app. `client_id` é gerado pelo app e identifica o treino
+    # entre reenvios (idempotência); `executed_at` é o horário real do treino no aparelho.
+    client_id: str = Field(min_length=1, max_length=64)
+    executed_at: Optional[NaiveUTCDateTime] = None
+
+class TrainingExecutionSyncResult(BaseModel):
+    client_id: str
+    execution_id: int
+    duplicate: bool = False
+
 class TrainingExecutionOut(TrainingExecutionBase):
     id: int
     executed_at: datetime
@@ -220,6 +289,30 @@ class ExerciseEvolutionItem(BaseModel):
     total_executions: int = 0
 
 
+class StudentEvolutionReport(BaseModel):
+    # Evolução de um aluno no relatório consolidado da turma do professor.
+    student_id: int
+    name: str
+    total_executions: int = 0
+    last_executed_at: Optional[datetime] = None
+    exercises: List[ExerciseEvolutionItem] = []
+
+
+class ExerciseVolumeSeriesItem(BaseModel):
+    # Ponto da série temporal de volume/1RM estimado de um exercício (por semana ou mês).
+    exercise_id: int
+    name: str
+    type: ExerciseType
+    group: Optional[str] = None
+    bucket_start: datetime
+    executions: int = 0
+    total_sets: int = 0
+    total_reps: float = 0
+    tonnage_kg: float = 0
+    best_load_kg: Optional[float] = None
+    best_e1rm_kg: Optional[float] = None
+
+
 class LastExercisePerformanceItem(BaseModel):
     # Última execução (por exercício) com dados realizados.
     exercise_id: int
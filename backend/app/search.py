@@ -0,0 +1,150 @@
+"""
+Busca textual na biblioteca de exercícios (nome, grupo, descrição e dicas), sem diferenciar acentos.
+
+- SQLite: tabela virtual FTS5 `exercises_fts` com conteúdo externo (lê de `exercises`), tokenizador
+  unicode61 com remove_diacritics e índice de prefixos; mantida por triggers em `exercises`.
+- PostgreSQL: índice GIN sobre um tsvector com pesos por campo, usando a configuração `pt_unaccent`
+  (português + extensão unaccent).
+
+As estruturas são criadas por `ensure_exercise_search` (chamada em `run_migrations`) e a consulta é
+montada por `exercise_search_query`. Cada termo digitado vale como prefixo: "eleva" encontra "Elevação".
+
+A busca é opcional: se as estruturas não puderem ser criadas (ex.: usuário do PostgreSQL sem permissão para
+CREATE EXTENSION, SQLite sem FTS5), a API sobe normalmente e a busca usa ILIKE (trecho em qualquer campo,
+ordem alfabética, sem ignorar acentos).
+"""
+
+import logging
+import re
+from typing import List, Optional
+
+from sqlalchemy import Select, column, inspect, or_, select, table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .models import Exercise
+
+logger = logging.getLogger(__name__)
+
+MAX_SEARCH_TERMS = 8
+_TERM_RE = re.compile(r"\w+")
+
+_SQLITE_COLUMNS = 'name, "group", description, tips'
+_SQLITE_NEW = 'new.id, new.name, new."group", new.description, new.tips'
+_SQLITE_OLD = 'old.id, old.name, old."group", old.description, old.tips'
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS exercises_fts USING fts5("
+    f"{_SQLITE_COLUMNS}, content='exercises', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS exercises_fts_ai AFTER INSERT ON exercises BEGIN "
+    f"INSERT INTO exercises_fts(rowid, {_SQLITE_COLUMNS}) VALUES ({_SQLITE_NEW}); END",
+    "CREATE TRIGGER IF NOT EXISTS exercises_fts_ad AFTER DELETE ON exercises BEGIN "
+    f"INSERT INTO exercises_fts(exercises_fts, rowid, {_SQLITE_COLUMNS}) VALUES ('delete', {_SQLITE_OLD}); END",
+    'CREATE TRIGGER IF NOT EXISTS exercises_fts_au AFTER UPDATE OF name, "group", description, tips '
+    "ON exercises BEGIN "
+    f"INSERT INTO exercises_fts(exercises_fts, rowid, {_SQLITE_COLUMNS}) VALUES ('delete', {_SQLITE_OLD}); "
+    f"INSERT INTO exercises_fts(rowid, {_SQLITE_COLUMNS}) VALUES ({_SQLITE_NEW}); END",
+)
+# Pesos do bm25 na ordem das colunas: o nome conta mais que grupo, descrição e dicas.
+_SQLITE_RANK = "bm25(exercises_fts, 10.0, 5.0, 2.0, 1.0)"
+
+# A mesma expressão é usada no índice e na consulta (o planner só usa o índice se forem idênticas).
+_PG_VECTOR = (
+    "setweight(to_tsvector('pt_unaccent'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('pt_unaccent'::regconfig, coalesce(\"group\", '')), 'B') || "
+    "setweight(to_tsvector('pt_unaccent'::regconfig, coalesce(description, '')), 'C') || "
+    "setweight(to_tsvector('pt_unaccent'::regconfig, coalesce(tips, '')), 'D')"
+)
+_PG_QUERY = "to_tsquery('pt_unaccent'::regconfig, :search_query)"
+_PG_DDL = (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "DO $$ BEGIN "
+    "IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN "
+    "CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese); "
+    "ALTER TEXT SEARCH CONFIGURATION pt_unaccent "
+    "ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem; "
+    "END IF; END $$",
+    f"CREATE INDEX IF NOT EXISTS ix_exercises_search ON exercises USING gin (({_PG_VECTOR}))",
+)
+
+
+# Se a busca textual está disponível neste banco (None: ainda não verificado no processo).
+_full_text_ready: Optional[bool] = None
+
+
+def _has_full_text(conn: Connection) -> bool:
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        return "exercises_fts" in inspect(conn).get_table_names()
+    if dialect == "postgresql":
+        return conn.execute(text("SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent'")).first() is not None
+    return False
+
+
+def ensure_exercise_search(engine: Engine) -> None:
+    # Idempotente. No SQLite, a tabela FTS recém-criada é populada com os exercícios já existentes.
+    # Falhas (permissão, extensão ausente) são registradas no log e não impedem a API de subir.
+    global _full_text_ready
+    dialect = engine.dialect.name
+    try:
+        if dialect == "sqlite":
+            created = "exercises_fts" not in inspect(engine).get_table_names()
+            with engine.begin() as conn:
+                for ddl in _SQLITE_DDL:
+                    conn.execute(text(ddl))
+                if created:
+                    conn.execute(text("INSERT INTO exercises_fts(exercises_fts) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            with engine.begin() as conn:
+                for ddl in _PG_DDL:
+                    conn.execute(text(ddl))
+    except SQLAlchemyError as exc:
+        logger.warning("Busca textual de exercícios indisponível (%s); usando ILIKE: %s", dialect, exc)
+    _full_text_ready = None
+
+
+def full_text_ready(db: Session) -> bool:
+    global _full_text_ready
+    if _full_text_ready is None:
+        _full_text_ready = _has_full_text(db.connection())
+    return _full_text_ready
+
+
+def search_terms(value: str) -> List[str]:
+    # Só letras/dígitos: o restante (aspas, operadores da sintaxe de busca) é descartado.
+    return _TERM_RE.findall(value.lower())[:MAX_SEARCH_TERMS]
+
+
+def _ilike_search_query(terms: List[str]) -> Select:
+    # Alternativa sem as estruturas de busca: cada termo precisa aparecer (como trecho) em algum campo.
+    fields = (Exercise.name, Exercise.group, Exercise.description, Exercise.tips)
+    query = select(Exercise)
+    for term in terms:
+        # Os termos só têm letras, dígitos e "_" (ver `search_terms`): só "_" precisa de escape no LIKE.
+        pattern = "%" + term.replace("_", "\\_") + "%"
+        query = query.where(or_(*(field.ilike(pattern, escape="\\") for field in fields)))
+    return query.order_by(Exercise.name, Exercise.id)
+
+
+def exercise_search_query(db: Session, terms: List[str]) -> Select:
+    # SELECT de Exercise com todos os termos (como prefixo), do mais relevante para o menos relevante.
+    if not full_text_ready(db):
+        return _ilike_search_query(terms)
+    if db.get_bind().dialect.name == "postgresql":
+        search_query = " & ".join(f"{term}:*" for term in terms)
+        return (
+            select(Exercise)
+            .where(text(f"({_PG_VECTOR}) @@ {_PG_QUERY}").bindparams(search_query=search_query))
+            .order_by(text(f"ts_rank({_PG_VECTOR}, {_PG_QUERY}) DESC").bindparams(search_query=search_query))
+            .order_by(Exercise.id)
+        )
+    fts = table("exercises_fts", column("rowid"))
+    search_query = " ".join(f'"{term}"*' for term in terms)
+    return (
+        select(Exercise)
+        .join(fts, fts.c.rowid == Exercise.id)
+        .where(text("exercises_fts MATCH :search_query").bindparams(search_query=search_query))
+        .order_by(text(_SQLITE_RANK))
+        .order_by(Exercise.id)
+    )
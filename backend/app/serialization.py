@@ -0,0 +1,77 @@
+"""
+Serialização JSON do backend (blobs gravados no banco e respostas da API).
+
+Usa orjson quando está instalado (dependência opcional, bem mais rápida que o `json` da biblioteca padrão)
+e cai para o `json` padrão caso contrário. Os dois caminhos geram JSON compacto em UTF-8 (sem escapar acentos),
+então dados gravados por um podem ser lidos pelo outro.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse as _StarletteJSONResponse, Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+
+# Headers de paginação das listas (expostos ao frontend pelo CORS em main.py): cursor opaco (keyset)
+# ou deslocamento numérico da próxima página.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+NEXT_OFFSET_HEADER = "X-Next-Offset"
+
+
+def dumps_bytes(value: Any, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(value, option=option)
+        except TypeError:
+            # Tipos que o orjson não conhece (ex.: inteiros maiores que 64 bits) seguem pelo json padrão.
+            pass
+    return json.dumps(value, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(value: Any, sort_keys: bool = False) -> str:
+    # JSON em string (colunas Text/JSON). `sort_keys` gera a forma canônica usada em hashes de conteúdo.
+    return dumps_bytes(value, sort_keys=sort_keys).decode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    # Aceita str/bytes; erros de sintaxe levantam ValueError nos dois caminhos.
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_json(value: Any) -> Any:
+    # Converte JSON guardado como string para Python; valores já decodificados (ex.: colunas JSON) passam direto.
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        try:
+            return loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+def model_response(adapter: TypeAdapter, content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    # Resposta já serializada pelo pydantic-core, sem a revalidação do `response_model` pelo FastAPI.
+    # Uso restrito a read-models montados pelo próprio backend com `model_construct` a partir do banco
+    # (o `response_model` da rota continua documentando o formato no OpenAPI).
+    return json_bytes_response(adapter.dump_json(content), headers)
+
+
+def json_bytes_response(body: bytes, headers: Optional[Dict[str, str]] = None) -> Response:
+    # Corpo JSON já serializado (ex.: guardado em cache).
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class JSONResponse(_StarletteJSONResponse):
+    # Resposta JSON renderizada por `dumps_bytes` (orjson quando disponível).
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
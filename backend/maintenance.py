@@ -0,0 +1,130 @@
+"""Comandos de manutenção do banco (recalcular dados derivados a partir do histórico bruto).
+
+Uso:
+    python maintenance.py rebuild-evolution [--student-id ID]
+    python maintenance.py backfill-sets [--reparse]
+    python maintenance.py rebuild-rollups [--student-id ID]
+    python maintenance.py compact-snapshots
+    python maintenance.py rebuild-usage [--professor-id ID]
+"""
+
+import argparse
+
+from app.database import Base, SessionLocal, engine
+from app.migrations import run_migrations
+from app.models import Student
+from app.routers.executions import (
+    _backfill_exercise_sets,
+    _compact_snapshots,
+    _rebuild_student_evolution,
+    _rebuild_student_rollups,
+    _reparse_exercise_sets,
+)
+from app.routers.plans import _rebuild_exercise_usage
+
+
+def _student_ids(db, student_id=None):
+    query = db.query(Student.id).order_by(Student.id)
+    if student_id is not None:
+        query = query.filter(Student.id == student_id)
+    return [row.id for row in query.all()]
+
+
+def rebuild_evolution(student_id=None) -> None:
+    # Recalcula o agregado de evolução (student_exercise_evolution) de um aluno ou de todos.
+    db = SessionLocal()
+    try:
+        for sid in _student_ids(db, student_id):
+            total = _rebuild_student_evolution(db, sid)
+            db.commit()
+            print(f"Aluno {sid}: {total} exercicio(s) recalculado(s).")
+    finally:
+        db.close()
+
+
+def rebuild_rollups(student_id=None) -> None:
+    # Recalcula as séries semanais/mensais de volume e 1RM estimado (exercise_volume_rollups).
+    # Depende de exercise_sets (preenchida para o histórico antigo por `run_migrations`).
+    db = SessionLocal()
+    try:
+        for sid in _student_ids(db, student_id):
+            total = _rebuild_student_rollups(db, sid)
+            db.commit()
+            print(f"Aluno {sid}: {total} periodo(s) recalculado(s).")
+    finally:
+        db.close()
+
+
+def backfill_sets(reparse: bool = False) -> None:
+    # Normaliza as séries de execuções antigas (ExerciseExecution.data) em exercise_sets. Já roda
+    # uma vez automaticamente em `run_migrations`; aqui serve para reprocessar. Com --reparse, reinterpreta também os valores numéricos das séries já existentes.
+    db = SessionLocal()
+    try:
+        total = _backfill_exercise_sets(db)
+        print(f"{total} serie(s) criada(s).")
+        if reparse:
+            total = _reparse_exercise_sets(db)
+            print(f"{total} serie(s) reinterpretada(s).")
+    finally:
+        db.close()
+
+
+def compact_snapshots() -> None:
+    # Deduplica os snapshots de prescrição embutidos nas execuções antigas (prescription_snapshots). Já roda
+    # uma vez automaticamente em `run_migrations`; aqui serve para reprocessar.
+    db = SessionLocal()
+    try:
+        total = _compact_snapshots(db)
+        print(f"{total} item(ns) de execucao compactado(s).")
+    finally:
+        db.close()
+
+
+def rebuild_usage(professor_id=None) -> None:
+    # Recalcula os contadores de uso de exercícios por professor (exercise_usage) a partir das fichas.
+    db = SessionLocal()
+    try:
+        total = _rebuild_exercise_usage(db, professor_id)
+        db.commit()
+        print(f"{total} contador(es) de uso recalculado(s).")
+    finally:
+        db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manutencao do Sistema Fitness Total")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    evolution = sub.add_parser("rebuild-evolution", help="Recalcula a evolucao por exercicio a partir das execucoes")
+    evolution.add_argument("--student-id", type=int, default=None)
+
+    sets = sub.add_parser("backfill-sets", help="Preenche exercise_sets a partir do JSON das execucoes antigas")
+    sets.add_argument("--reparse", action="store_true", help="Reinterpreta carga/reps das series ja existentes")
+
+    rollups = sub.add_parser("rebuild-rollups", help="Recalcula as series de volume/1RM estimado por periodo")
+    rollups.add_argument("--student-id", type=int, default=None)
+
+    sub.add_parser("compact-snapshots", help="Deduplica os snapshots de prescricao das execucoes antigas")
+
+    usage = sub.add_parser("rebuild-usage", help="Recalcula os contadores de uso de exercicios por professor")
+    usage.add_argument("--professor-id", type=int, default=None)
+
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+    if args.command == "rebuild-evolution":
+        rebuild_evolution(args.student_id)
+    elif args.command == "backfill-sets":
+        backfill_sets(args.reparse)
+    elif args.command == "rebuild-rollups":
+        rebuild_rollups(args.student_id)
+    elif args.command == "compact-snapshots":
+        compact_snapshots()
+    elif args.command == "rebuild-usage":
+        rebuild_usage(args.professor_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Fixtures dos testes da API: banco SQLite temporário, cliente HTTP e uma ficha mínima (professor, aluno,
+plano, sessão com dois exercícios). Cada teste cria os próprios usuários, então o banco pode ser compartilhado.
+"""
+
+import os
+import tempfile
+import uuid
+from types import SimpleNamespace
+
+_DB_DIR = tempfile.mkdtemp(prefix="fitness-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}"
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token
+from app.database import SessionLocal
+from app.main import app
+from app.models import Student, User, UserType
+
+
+def auth_headers(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def ok(response):
+    assert response.status_code < 300, (response.status_code, response.text)
+    return response.json() if response.content else None
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def school(client, db):
+    tag = uuid.uuid4().hex[:8]
+    professor = User(name=f"Prof {tag}", email=f"prof-{tag}@test.com", hashed_password="x", type=UserType.PROFESSOR)
+    aluno = User(name=f"Aluno {tag}", email=f"aluno-{tag}@test.com", hashed_password="x", type=UserType.ALUNO)
+    db.add_all([professor, aluno])
+    db.flush()
+    student = Student(user_id=aluno.id, professor_id=professor.id)
+    db.add(student)
+    db.commit()
+
+    prof_headers = auth_headers(professor.id)
+    exercise_ids = [
+        ok(client.post("/exercicios/", json={"name": name, "group": group}, headers=prof_headers))["id"]
+        for name, group in (("Supino inclinado", "Peito"), ("Elevação lateral", "Ombro"))
+    ]
+    plan = ok(client.post("/planos/", json={"student_id": student.id, "name": "Plano A"}, headers=prof_headers))
+    session = ok(client.post("/planos/sessao", json={"plan_id": plan["id"], "name": "Treino A"}, headers=prof_headers))
+    items = ok(
+        client.post(
+            f"/planos/sessao/{session['id']}/exercicios/lote",
+            json=[{"exercise_id": ex_id, "params": {"series": 3}} for ex_id in exercise_ids],
+            headers=prof_headers,
+        )
+    )
+    return SimpleNamespace(
+        professor_id=professor.id,
+        student_id=student.id,
+        prof=prof_headers,
+        aluno=auth_headers(aluno.id),
+        plan_id=plan["id"],
+        session_id=session["id"],
+        items=items,
+        exercise_ids=exercise_ids,
+    )
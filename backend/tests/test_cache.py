@@ -0,0 +1,55 @@
+"""Cache em memória por dono (`app.cache.OwnerCache`)."""
+
+from app.cache import OwnerCache
+
+
+def test_stale_token_is_rejected_after_invalidation():
+    cache = OwnerCache()
+    _, token = cache.get("aluno", "agenda")
+    cache.invalidate("aluno")
+    cache.set("aluno", "agenda", b"antigo", token)
+    assert cache.get("aluno", "agenda")[0] is None
+
+    _, token = cache.get("aluno", "agenda")
+    cache.set("aluno", "agenda", b"novo", token)
+    assert cache.get("aluno", "agenda")[0] == b"novo"
+
+
+def test_generations_are_bounded_and_evicted_tokens_stay_stale():
+    cache = OwnerCache(max_owners=2)
+    _, stale = cache.get("a", "k")
+    cache.invalidate("a")
+    for owner in ("b", "c", "d"):
+        cache.invalidate(owner)
+    assert len(cache._generations) == 2
+
+    # "a" saiu das gerações, mas o token lido antes da invalidação continua inválido.
+    cache.set("a", "k", b"antigo", stale)
+    assert cache.get("a", "k")[0] is None
+    _, token = cache.get("a", "k")
+    assert token != stale
+    cache.set("a", "k", b"novo", token)
+    assert cache.get("a", "k")[0] == b"novo"
+
+
+def test_owner_for_loads_once_and_is_bounded():
+    cache = OwnerCache(max_owners=2)
+    calls = []
+
+    def loader(owner):
+        def load():
+            calls.append(owner)
+            return owner
+        return load
+
+    assert cache.owner_for(1, loader(10)) == 10
+    assert cache.owner_for(1, loader(99)) == 10
+    assert cache.owner_for(2, loader(None)) is None
+    assert cache.owner_for(2, loader(20)) == 20
+    cache.owner_for(3, loader(30))
+    assert len(cache._owners) == 2
+    assert calls == [10, None, 20, 30]
+
+    # O mais antigo (1) foi descartado e volta a ser consultado.
+    assert cache.owner_for(1, loader(10)) == 10
+    assert calls[-1] == 10
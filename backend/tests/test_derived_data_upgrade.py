@@ -0,0 +1,164 @@
+"""
+Upgrade de bancos com histórico gravado antes dos dados derivados: `run_migrations` recalcula tudo uma vez,
+inclusive alunos cujo agregado já tinha sido criado só com as execuções novas.
+"""
+
+from app.database import engine
+from app.migrations import run_migrations
+from app.models import (
+    DataMigration,
+    ExerciseExecution,
+    ExerciseSet,
+    ExerciseUsage,
+    PrescriptionSnapshot,
+    ExerciseVolumeRollup,
+    StudentExerciseEvolution,
+    TrainingExecution,
+)
+
+from app.serialization import dumps, loads
+
+from conftest import ok
+
+
+def _workout(school, load, executed_at=None, client_id=None):
+    item = {
+        "student_id": school.student_id,
+        "session_id": school.session_id,
+        "exercises": [
+            {"session_exercise_id": school.items[0]["id"], "performed": {"set_details": [{"load": load, "reps": 5}]}}
+        ],
+    }
+    if executed_at is not None:
+        item.update(client_id=client_id, executed_at=executed_at)
+    return item
+
+
+def _simulate_legacy_history(client, db, school):
+    # Histórico antigo (100 e 80) sem os dados derivados e sem as migrações de dados registradas.
+    for load, executed_at in (("100", "2024-01-01T10:00:00"), ("80", "2024-02-05T10:00:00")):
+        ok(client.post("/execucoes/lote", json=[_workout(school, load, executed_at, f"old-{load}")], headers=school.aluno))
+    db.query(StudentExerciseEvolution).filter(StudentExerciseEvolution.student_id == school.student_id).delete()
+    db.query(DataMigration).delete()
+    db.commit()
+
+
+def _supino(client, school, path="/execucoes/minhas/evolucao"):
+    return next(e for e in ok(client.get(path, headers=school.aluno)) if e["exercise_id"] == school.exercise_ids[0])
+
+
+def test_upgrade_counts_history_recorded_before_the_aggregate(client, db, school):
+    _simulate_legacy_history(client, db, school)
+    run_migrations(engine)
+
+    ok(client.post("/execucoes/", json=_workout(school, "60"), headers=school.aluno))
+
+    supino = _supino(client, school)
+    assert supino["best_load"] == "100"
+    assert supino["last_load"] == "60"
+    assert supino["total_executions"] == 3
+
+
+def test_upgrade_repairs_aggregate_built_only_from_new_workouts(client, db, school):
+    _simulate_legacy_history(client, db, school)
+    # Treino registrado antes da migração rodar: cria o agregado só com ele.
+    ok(client.post("/execucoes/", json=_workout(school, "60"), headers=school.aluno))
+    assert _supino(client, school)["total_executions"] == 1
+
+    run_migrations(engine)
+
+    supino = _supino(client, school)
+    assert (supino["best_load"], supino["total_executions"]) == ("100", 3)
+    cohort = ok(client.get("/execucoes/professor/coorte", headers=school.prof))
+    assert [e["total_executions"] for e in cohort[0]["exercises"] if e["exercise_id"] == school.exercise_ids[0]] == [3]
+
+
+def test_upgrade_repairs_volume_series_built_only_from_new_workouts(client, db, school):
+    _simulate_legacy_history(client, db, school)
+    db.query(ExerciseVolumeRollup).filter(ExerciseVolumeRollup.student_id == school.student_id).delete()
+    db.commit()
+    ok(client.post("/execucoes/", json=_workout(school, "60"), headers=school.aluno))
+
+    run_migrations(engine)
+
+    params = {"bucket": "month", "exercise_id": school.exercise_ids[0]}
+    series = ok(client.get("/execucoes/minhas/series", params=params, headers=school.aluno))
+    assert [(p["bucket_start"][:7], p["best_load_kg"], p["executions"]) for p in series][:2] == [
+        ("2024-01", 100.0, 1),
+        ("2024-02", 80.0, 1),
+    ]
+    assert sum(p["executions"] for p in series) == 3
+
+
+def _student_sets(db, school):
+    return (
+        db.query(ExerciseSet.load_kg, ExerciseSet.reps)
+        .join(ExerciseExecution, ExerciseExecution.id == ExerciseSet.exercise_execution_id)
+        .join(TrainingExecution, TrainingExecution.id == ExerciseExecution.training_execution_id)
+        .filter(TrainingExecution.student_id == school.student_id)
+        .order_by(ExerciseSet.load_kg)
+        .all()
+    )
+
+
+def test_upgrade_backfills_sets_of_old_executions(client, db, school):
+    _simulate_legacy_history(client, db, school)
+    item_ids = [
+        item_id
+        for (item_id,) in db.query(ExerciseExecution.id)
+        .join(TrainingExecution, TrainingExecution.id == ExerciseExecution.training_execution_id)
+        .filter(TrainingExecution.student_id == school.student_id)
+    ]
+    db.query(ExerciseSet).filter(ExerciseSet.exercise_execution_id.in_(item_ids)).delete()
+    db.commit()
+
+    run_migrations(engine)
+
+    assert [tuple(row) for row in _student_sets(db, school)] == [(80.0, 5.0), (100.0, 5.0)]
+
+
+def test_upgrade_seeds_exercise_usage_from_existing_plans(client, db, school):
+    db.query(ExerciseUsage).filter(ExerciseUsage.professor_id == school.professor_id).delete()
+    db.query(DataMigration).delete()
+    db.commit()
+    assert ok(client.get("/exercicios/sugestoes", headers=school.prof)) == []
+
+    run_migrations(engine)
+
+    suggestions = ok(client.get("/exercicios/sugestoes", headers=school.prof))
+    assert sorted((s["id"], s["uses"]) for s in suggestions) == [(ex_id, 1) for ex_id in sorted(school.exercise_ids)]
+
+
+def test_upgrade_compacts_embedded_snapshots(client, db, school):
+    _simulate_legacy_history(client, db, school)
+    history = ok(client.get("/execucoes/minhas", headers=school.aluno))
+    items = (
+        db.query(ExerciseExecution)
+        .join(TrainingExecution, TrainingExecution.id == ExerciseExecution.training_execution_id)
+        .filter(TrainingExecution.student_id == school.student_id)
+        .all()
+    )
+    hashes = {}
+    # Formato antigo: o snapshot da prescrição fica embutido no próprio item executado.
+    for item in items:
+        snapshot = db.get(PrescriptionSnapshot, item.snapshot_hash).data
+        hashes[item.id] = item.snapshot_hash
+        item.data = dumps({"snapshot": loads(snapshot), "performed": loads(item.data).get("performed")})
+        item.snapshot_hash = None
+    db.commit()
+
+    run_migrations(engine)
+
+    db.expire_all()
+    for item in items:
+        assert item.snapshot_hash == hashes[item.id]
+        assert "snapshot" not in loads(item.data)
+    assert ok(client.get("/execucoes/minhas", headers=school.aluno)) == history
+
+
+def test_data_migrations_run_once(db):
+    run_migrations(engine)
+    names = [name for (name,) in db.query(DataMigration.name)]
+    run_migrations(engine)
+    assert sorted(names) == sorted(name for (name,) in db.query(DataMigration.name))
+    assert len(names) == len(set(names)) > 0
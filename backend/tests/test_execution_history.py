@@ -0,0 +1,47 @@
+"""Histórico de execuções paginado por cursor (`GET /execucoes/minhas`, `/execucoes/aluno/{id}`)."""
+
+from app.models import TrainingExecution
+
+from conftest import ok
+
+
+def _sync(client, school, *times):
+    items = [
+        {"student_id": school.student_id, "session_id": school.session_id, "client_id": f"h-{at}", "executed_at": at}
+        for at in times
+    ]
+    return [r["execution_id"] for r in ok(client.post("/execucoes/lote", json=items, headers=school.aluno))]
+
+
+def _all_pages(client, school, limit, **params):
+    ids, cursor = [], None
+    while True:
+        query = {"limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/execucoes/minhas", params=query, headers=school.aluno)
+        assert response.status_code == 200, response.text
+        ids += [r["id"] for r in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids
+
+
+def test_pages_cross_executions_without_date(client, db, school):
+    ids = _sync(client, school, "2024-03-01T10:00:00", "2024-03-02T10:00:00", "2024-03-03T10:00:00", "2024-03-04T10:00:00")
+    # Registros antigos podem não ter data: ficam no fim do histórico, sem sumir entre páginas.
+    undated = ids[1:3]
+    db.query(TrainingExecution).filter(TrainingExecution.id.in_(undated)).update(
+        {TrainingExecution.executed_at: None}, synchronize_session=False
+    )
+    db.commit()
+
+    expected = [ids[3], ids[0], *sorted(undated, reverse=True)]
+    assert _all_pages(client, school, limit=1) == expected
+    assert _all_pages(client, school, limit=3) == expected
+
+
+def test_date_filters_with_time_zone_are_compared_in_utc(client, school):
+    first, second = _sync(client, school, "2024-03-01T12:00:00", "2024-03-01T14:00:00")
+
+    # 10:00 em -03:00 = 13:00 UTC: só o treino das 14:00 (UTC) entra.
+    assert _all_pages(client, school, limit=10, **{"from": "2024-03-01T10:00:00-03:00"}) == [second]
+    assert _all_pages(client, school, limit=10, **{"to": "2024-03-01T13:00:00Z"}) == [first]
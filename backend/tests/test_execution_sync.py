@@ -0,0 +1,77 @@
+"""Sincronização em lote de treinos registrados offline (`POST /execucoes/lote`)."""
+
+from datetime import datetime
+
+from app.models import TrainingExecution
+
+from conftest import ok
+
+
+def _item(school, client_id, executed_at, load):
+    return {
+        "student_id": school.student_id,
+        "session_id": school.session_id,
+        "client_id": client_id,
+        "executed_at": executed_at,
+        "exercises": [
+            {"session_exercise_id": school.items[0]["id"], "performed": {"set_details": [{"load": load, "reps": 8}]}}
+        ],
+    }
+
+
+def test_sync_accepts_timezone_aware_and_naive_times(client, db, school):
+    batch = [
+        _item(school, "tz-naive", "2024-03-01T12:00:00", "50"),
+        _item(school, "tz-utc", "2024-03-01T11:00:00Z", "40"),
+        _item(school, "tz-brt", "2024-03-01T10:30:00-03:00", "45"),
+    ]
+    results = ok(client.post("/execucoes/lote", json=batch, headers=school.aluno))
+    assert [r["duplicate"] for r in results] == [False, False, False]
+
+    stored = dict(
+        db.query(TrainingExecution.client_id, TrainingExecution.executed_at)
+        .filter(TrainingExecution.student_id == school.student_id)
+        .all()
+    )
+    assert stored == {
+        "tz-naive": datetime(2024, 3, 1, 12, 0),
+        "tz-utc": datetime(2024, 3, 1, 11, 0),
+        "tz-brt": datetime(2024, 3, 1, 13, 30),
+    }
+
+    # Ordem cronológica já em UTC: a última execução do lote é a das 13:30.
+    (supino,) = ok(client.get("/execucoes/minhas/evolucao", headers=school.aluno))
+    assert (supino["last_load"], supino["best_load"], supino["total_executions"]) == ("45", "50", 3)
+
+    # Reenvio do mesmo lote: nada é gravado de novo.
+    results = ok(client.post("/execucoes/lote", json=batch, headers=school.aluno))
+    assert [r["duplicate"] for r in results] == [True, True, True]
+
+
+def test_sync_with_older_and_newer_workouts_counts_each_once(client, school):
+    ok(client.post("/execucoes/lote", json=[_item(school, "mar-05", "2024-03-05T10:00:00", "50")], headers=school.aluno))
+    # Lote com um treino anterior ao último registrado (recalcula do histórico) e um posterior.
+    ok(client.post("/execucoes/lote", json=[
+        _item(school, "mar-01", "2024-03-01T10:00:00", "40"),
+        _item(school, "mar-10", "2024-03-10T10:00:00", "60"),
+    ], headers=school.aluno))
+
+    (supino,) = ok(client.get("/execucoes/minhas/evolucao", headers=school.aluno))
+    assert supino["total_executions"] == 3
+    assert (supino["last_load"], supino["prev_load"], supino["best_load"]) == ("60", "50", "60")
+    assert supino["delta_load_value"] == 10
+
+
+def test_volume_rollups_add_up_workouts_of_the_same_week(client, school):
+    # O primeiro treino da semana não tem carga (melhor carga NULL); os seguintes somam na mesma linha.
+    no_load = _item(school, "wk-1", "2024-03-04T10:00:00", "50")
+    no_load["exercises"][0]["performed"] = {"set_details": [{"reps": 5}]}
+    ok(client.post("/execucoes/lote", json=[no_load], headers=school.aluno))
+    ok(client.post("/execucoes/lote", json=[_item(school, "wk-2", "2024-03-05T10:00:00", "50")], headers=school.aluno))
+    ok(client.post("/execucoes/lote", json=[_item(school, "wk-3", "2024-03-06T10:00:00", "40")], headers=school.aluno))
+
+    params = {"bucket": "week", "exercise_id": school.exercise_ids[0]}
+    (week,) = ok(client.get("/execucoes/minhas/series", params=params, headers=school.aluno))
+    assert (week["executions"], week["total_sets"], week["total_reps"]) == (3, 3, 21.0)
+    assert week["tonnage_kg"] == 50 * 8 + 40 * 8
+    assert week["best_load_kg"] == 50.0
@@ -0,0 +1,38 @@
+"""Importação em massa da biblioteca de exercícios (`POST /exercicios/importar`)."""
+
+from app.models import Exercise, ExerciseType
+
+from conftest import ok
+
+
+def _import(client, school, content, filename="exercicios.csv"):
+    files = {"file": (filename, content.encode("utf-8"), "text/csv")}
+    return ok(client.post("/exercicios/importar", files=files, headers=school.prof))
+
+
+def test_csv_blank_optional_cells_use_defaults(client, db, school):
+    result = _import(
+        client,
+        school,
+        "name,group,type,description\n"
+        "Supino  Reto,Peito,,\n"
+        "supino reto,Peito,,\n"
+        "Remada baixa,,,\n"
+        ",Costas,,\n"
+        ",,,\n",
+    )
+
+    assert result["created"] == 2
+    assert [(d["line"], d["detail"]) for d in result["duplicates"]] == [(3, "Exercício 'supino reto' já existe")]
+    assert [e["line"] for e in result["errors"]] == [5]
+    assert result["errors"][0]["detail"].startswith("name:")
+
+    imported = dict(
+        db.query(Exercise.name, Exercise.type)
+        .filter(Exercise.professor_id == school.professor_id)
+        .filter(Exercise.name.in_(["Supino  Reto", "Remada baixa"]))
+        .all()
+    )
+    assert imported == {"Supino  Reto": ExerciseType.MUSCULACAO, "Remada baixa": ExerciseType.MUSCULACAO}
+    remada = db.query(Exercise).filter(Exercise.professor_id == school.professor_id, Exercise.name == "Remada baixa").one()
+    assert remada.group is None
@@ -0,0 +1,49 @@
+"""Busca na biblioteca de exercícios (`GET /exercicios/busca`)."""
+
+from conftest import ok
+
+
+def test_search_pages_by_offset(client, school):
+    for name in ("Agachamento livre", "Agachamento búlgaro", "Agachamento sumô"):
+        ok(client.post("/exercicios/", json={"name": name, "group": "Pernas"}, headers=school.prof))
+
+    first = client.get("/exercicios/busca", params={"q": "agachamento", "limit": 2}, headers=school.prof)
+    assert first.status_code == 200
+    assert len(first.json()) == 2
+    assert first.headers["X-Next-Offset"] == "2"
+    assert "X-Next-Cursor" not in first.headers
+
+    last = client.get("/exercicios/busca", params={"q": "agachamento", "limit": 2, "offset": 2}, headers=school.prof)
+    assert len(last.json()) == 1
+    assert "X-Next-Offset" not in last.headers
+    assert {e["name"] for e in first.json() + last.json()} == {
+        "Agachamento livre",
+        "Agachamento búlgaro",
+        "Agachamento sumô",
+    }
+
+    invalid = client.get("/exercicios/busca", params={"q": "agachamento", "offset": -1}, headers=school.prof)
+    assert invalid.status_code == 422
+
+
+def test_search_falls_back_to_ilike_without_full_text(client, school, monkeypatch):
+    from app import search
+
+    ok(client.post("/exercicios/", json={"name": "Remada curvada", "group": "Costas"}, headers=school.prof))
+    ok(client.post("/exercicios/", json={"name": "Remada_unilateral", "group": "Costas"}, headers=school.prof))
+    monkeypatch.setattr(search, "_full_text_ready", False)
+
+    found = ok(client.get("/exercicios/busca", params={"q": "REMADA cost"}, headers=school.prof))
+    assert [e["name"] for e in found] == ["Remada curvada", "Remada_unilateral"]
+    # "_" é literal, não curinga do LIKE.
+    found = ok(client.get("/exercicios/busca", params={"q": "remada_u"}, headers=school.prof))
+    assert [e["name"] for e in found] == ["Remada_unilateral"]
+
+
+def test_search_setup_failure_does_not_stop_the_api(monkeypatch, caplog):
+    from app import search
+    from app.database import engine
+
+    monkeypatch.setattr(search, "_SQLITE_DDL", ("CREATE VIRTUAL TABLE exercises_fts_x USING modulo_inexistente()",))
+    search.ensure_exercise_search(engine)
+    assert "Busca textual de exercícios indisponível" in caplog.text
@@ -0,0 +1,96 @@
+"""
+As listas servidas sem a revalidação do `response_model` (read-models com `model_construct` + TypeAdapter,
+ou bytes em cache) precisam ser byte a byte iguais ao que o FastAPI geraria validando o `response_model`.
+As rotas de referência abaixo servem os mesmos dados pelo caminho validado do FastAPI.
+"""
+
+from typing import List
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.security import get_current_user
+from app.database import get_db
+from app.models import Exercise, User
+from app.routers.executions import _build_execution_reports, _query_history_page
+from app.schemas import ExerciseOut, TrainingExecutionReport
+
+from conftest import ok
+
+reference = FastAPI()
+
+
+@reference.get("/historico/{student_id}", response_model=List[TrainingExecutionReport])
+def reference_history(student_id: int, db: Session = Depends(get_db)):
+    execs, _ = _query_history_page(db, student_id, None, None, None, None, None)
+    # Dicionários (e não as instâncias) para o FastAPI validar cada campo.
+    return [report.model_dump() for report in _build_execution_reports(db, execs)]
+
+
+@reference.get("/biblioteca", response_model=List[ExerciseOut])
+def reference_library(db: Session = Depends(get_db), current: User = Depends(get_current_user)):
+    return (
+        db.query(Exercise)
+        .filter((Exercise.professor_id == current.id) | (Exercise.professor_id.is_(None)))
+        .all()
+    )
+
+
+@pytest.fixture
+def reference_client():
+    return TestClient(reference)
+
+
+def test_history_matches_validated_response_model(client, reference_client, school):
+    ok(client.post("/execucoes/lote", json=[
+        {
+            "student_id": school.student_id,
+            "session_id": school.session_id,
+            "client_id": "eq-1",
+            "executed_at": "2024-03-01T12:00:00.123456",
+            "status": "PARCIAL",
+            "rpe": 8,
+            "comment": "Série final com ajuda ✓",
+            "exercises": [
+                {
+                    "session_exercise_id": school.items[0]["id"],
+                    "performed": {"set_details": [{"load": "42.5", "reps": 8}], "notes": None},
+                    "notes": "pegada fechada",
+                },
+            ],
+        },
+        # Sem exercícios nem rpe/comentário: campos opcionais vazios (None) nos dois níveis.
+        {"student_id": school.student_id, "session_id": school.session_id, "client_id": "eq-2",
+         "executed_at": "2024-03-02T07:30:00-03:00"},
+    ], headers=school.aluno))
+
+    fast = client.get(f"/execucoes/aluno/{school.student_id}", headers=school.prof)
+    validated = reference_client.get(f"/historico/{school.student_id}")
+
+    assert fast.status_code == validated.status_code == 200
+    assert fast.content == validated.content
+    reports = fast.json()
+    assert {r["status"] for r in reports} == {"PARCIAL", "CONCLUIDO"}
+    assert any(r["rpe"] is None and r["comment"] is None for r in reports)
+
+
+def test_library_matches_validated_response_model(client, db, reference_client, school):
+    ok(client.post("/exercicios/", json={
+        "name": "Corrida intervalada",
+        "type": "CORRIDA",
+        "endurance_params": {"distancia_km": 5.5, "zonas": [2, 4], "ritmo": None},
+        "video_url": "https://example.com/v?x=1&y=ação",
+    }, headers=school.prof))
+    archived = ok(client.post("/exercicios/", json={"name": "Crucifixo máquina"}, headers=school.prof))
+    ok(client.delete(f"/exercicios/{archived['id']}", headers=school.prof))
+
+    fast = client.get("/exercicios/", headers=school.prof)
+    validated = reference_client.get("/biblioteca", headers=school.prof)
+
+    assert fast.status_code == validated.status_code == 200
+    assert fast.content == validated.content
+    names = {e["name"]: e for e in fast.json()}
+    assert names["Corrida intervalada"]["type"] == "CORRIDA"
+    assert names["Crucifixo máquina"]["active"] is False
@@ -1,6 +1,6 @@
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
-async function request(path, options = {}) {
+async function send(path, options = {}) {
   const token = localStorage.getItem('token');
   const headers = options.headers || {};
   if (!(options.body instanceof FormData) && !(options.body instanceof URLSearchParams)) {
@@ -12,10 +12,21 @@ async function request(path, options = {}) {
     const text = await res.text();
     throw new Error(text || 'Erro na requisição');
   }
+  return res;
+}
+
+async function request(path, options = {}) {
+  const res = await send(path, options);
   if (res.status === 204) return null;
   return res.json();
 }
 
+// Listas paginadas: a posição da próxima página vem em um header (ausente na última página).
+async function requestPage(path, pageHeader) {
+  const res = await send(path);
+  return { items: await res.json(), next: res.headers.get(pageHeader) };
+}
+
 // --- Auth ---
 export async function login(email, password) {
   const data = new URLSearchParams();
@@ -54,8 +65,27 @@ export const deleteMyAccount = () => request('/privacidade/me', { method: 'DELET
 
 // --- Exercises ---
 export const getExercises = () => request('/exercicios');
+export const searchExercises = async (query, options = {}) => {
+  const params = new URLSearchParams({ q: query });
+  if (options.limit) params.append('limit', options.limit);
+  if (options.offset) params.append('offset', options.offset);
+  const { items, next } = await requestPage(`/exercicios/busca?${params.toString()}`, 'X-Next-Offset');
+  return { items, nextOffset: next ? Number(next) : null };
+};
+export const getExerciseSuggestions = (prefix, limit) => {
+  const params = new URLSearchParams();
+  if (prefix) params.append('prefix', prefix);
+  if (limit) params.append('limit', limit);
+  const qs = params.toString() ? `?${params.toString()}` : '';
+  return request(`/exercicios/sugestoes${qs}`);
+};
 export const createExercise = (payload) =>
   request('/exercicios', { method: 'POST', body: JSON.stringify(payload) });
+export const importExercises = (file) => {
+  const data = new FormData();
+  data.append('file', file);
+  return request('/exercicios/importar', { method: 'POST', body: data });
+};
 export const getExerciseExplanation = (id) => request(`/exercicios/${id}/explicacao`);
 export const updateExercise = (id, payload) =>
   request(`/exercicios/${id}`, { method: 'PATCH', body: JSON.stringify(payload) });
@@ -98,21 +128,52 @@ export const updateSessionExercise = (itemId, payload) =>
   request(`/planos/sessao/exercicios/${itemId}`, { method: 'PATCH', body: JSON.stringify(payload) });
 export const deleteSessionExercise = (itemId) =>
   request(`/planos/sessao/exercicios/${itemId}`, { method: 'DELETE' });
+export const reorderSessionExercises = (sessionId, itemIds) =>
+  request(`/planos/sessao/${sessionId}/exercicios/ordem`, { method: 'PUT', body: JSON.stringify({ item_ids: itemIds }) });
+export const getSessionExerciseLineage = (itemId) => request(`/planos/sessao/exercicios/${itemId}/versoes`);
+export const getSessionExerciseHeads = (itemIds) => {
+  const params = new URLSearchParams();
+  itemIds.forEach((id) => params.append('ids', id));
+  return request(`/planos/sessao/exercicios/versoes-atuais?${params.toString()}`);
+};
 export const deleteSession = (sessionId) =>
   request(`/planos/sessao/${sessionId}`, { method: 'DELETE' });
 export const deactivatePlan = (planId) =>
   request(`/planos/${planId}/desativar`, { method: 'PATCH' });
 export const deletePlan = (planId) =>
   request(`/planos/${planId}`, { method: 'DELETE' });
+export const clonePlan = (planId, payload) =>
+  request(`/planos/${planId}/clonar`, { method: 'POST', body: JSON.stringify(payload) });
 
 // --- Executions ---
 export const createExecution = (payload) =>
   request('/execucoes', { method: 'POST', body: JSON.stringify(payload) });
-export const listExecutionsByStudent = (studentId) => request(`/execucoes/aluno/${studentId}`);
+export const syncExecutions = (items) =>
+  request('/execucoes/lote', { method: 'POST', body: JSON.stringify(items) });
+const historyQuery = (options = {}) => {
+  const params = new URLSearchParams();
+  if (options.limit) params.append('limit', options.limit);
+  if (options.cursor) params.append('cursor', options.cursor);
+  if (options.from) params.append('from', options.from);
+  if (options.to) params.append('to', options.to);
+  if (options.status) params.append('status', options.status);
+  return params.toString() ? `?${params.toString()}` : '';
+};
+// Retornam { items, nextCursor }; passe `nextCursor` como `options.cursor` para buscar a página seguinte.
+const historyPage = async (path, options) => {
+  const { items, next } = await requestPage(`${path}${historyQuery(options)}`, 'X-Next-Cursor');
+  return { items, nextCursor: next };
+};
+export const listExecutionsByStudent = (studentId, options = {}) =>
+  historyPage(`/execucoes/aluno/${studentId}`, options);
 export const getStudentEvolution = (studentId) => request(`/execucoes/aluno/${studentId}/evolucao`);
-export const listMyExecutions = () => request('/execucoes/minhas');
+export const getCohortEvolution = () => request('/execucoes/professor/coorte');
+export const listMyExecutions = (options = {}) => historyPage('/execucoes/minhas', options);
 export const getMyEvolution = () => request('/execucoes/minhas/evolucao');
 export const getMyLastExercises = () => request('/execucoes/minhas/ultimos_exercicios');
+export const getStudentVolumeSeries = (studentId, bucket = 'week') =>
+  request(`/execucoes/aluno/${studentId}/series?bucket=${bucket}`);
+export const getMyVolumeSeries = (bucket = 'week') => request(`/execucoes/minhas/series?bucket=${bucket}`);
 
 export { API_URL };
 
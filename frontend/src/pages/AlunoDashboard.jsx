@@ -150,7 +150,7 @@ export default function AlunoDashboard() {
     setHistoryLoading(true);
     try {
       const data = await listMyExecutions();
-      setHistoryExecutions(data);
+      setHistoryExecutions(data.items);
     } catch {
       setHistoryError('Nao foi possivel carregar o historico.');
     } finally {
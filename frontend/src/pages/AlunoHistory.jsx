@@ -38,7 +38,7 @@ export default function AlunoHistory() {
         getMyEvolution(),
         listMyPlans({ includeInactive: true }),
       ]);
-      setExecutions(data);
+      setExecutions(data.items);
       setEvolution(evo);
       setPlans(myPlans || []);
     } catch {
@@ -61,7 +61,7 @@ export default function ProfessorReports() {
         listExecutionsByStudent(resolvedId),
         getStudentEvolution(resolvedId),
       ]);
-      setExecutions(data);
+      setExecutions(data.items);
       setEvolution(evo);
     } catch (err) {
       setError('Erro ao carregar histórico do aluno.');